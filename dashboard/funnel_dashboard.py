@@ -3,59 +3,227 @@ Entelech Funnel Analytics Dashboard
 Interactive web dashboard for funnel performance and revenue attribution
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
+import hmac
+import io
 import json
+import orjson
+import ormsgpack
 import sqlite3
+import threading
+import functools
+from collections import Counter
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta, date
-import plotly.graph_objs as go
-import plotly.utils
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, Union
 import sys
 import os
+import tempfile
 
 # Add src directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from funnel_analytics_engine import FunnelAnalyticsEngine, ConversionMetrics
+from funnel_analytics_engine import FunnelAnalyticsEngine, ConversionMetrics, BottleneckAnalysis, EMPTY_METRICS
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson with native numpy and datetime support"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SERIALIZE_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'entelech-funnel-analytics-2025'
+app.json = OrjsonProvider(app)
+
+# Analytics only change when new data lands, so API responses are cached per
+# route and query string (start_date, end_date, model) for a few minutes
+API_CACHE_TIMEOUT = 300
+
+# Palette for the revenue-by-source chart
+_CHART_COLORS = ('#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA')
+
+# Exports above this many rows are streamed in chunks instead of buffered
+EXPORT_STREAM_ROWS = 100000
+EXPORT_CHUNK_ROWS = 10000
+
+# The default SimpleCache lives in each process, so with several gunicorn workers
+# set CACHE_TYPE=FileSystemCache (CACHE_DIR) or RedisCache (CACHE_REDIS_URL) to
+# share entries and let /api/cache/invalidate clear them for every worker
+cache = Cache(app, config={
+    'CACHE_TYPE': os.environ.get('CACHE_TYPE', 'SimpleCache'),
+    'CACHE_DIR': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'funnel-dashboard-cache')),
+    'CACHE_REDIS_URL': os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+    'CACHE_DEFAULT_TIMEOUT': API_CACHE_TIMEOUT,
+})
+
+# Shared secret for /api/cache/invalidate, sent in the X-Cache-Invalidate-Token
+# header; the endpoint refuses every request while this is unset
+CACHE_INVALIDATE_TOKEN = os.environ.get('CACHE_INVALIDATE_TOKEN', '')
+
+DB_PATH = os.environ.get(
+    'DATABASE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'funnel_analytics.db')
+)
+
+@functools.lru_cache(maxsize=1)
+def get_engine() -> FunnelAnalyticsEngine:
+    """Analytics engine, created on first use so pre-forked workers never share a SQLite handle"""
+    return FunnelAnalyticsEngine(DB_PATH)
+
+# Per-thread SQLite connections for queries issued directly by the dashboard
+_CONN_POOL = threading.local()
+
+# Weekly conversion metrics. Weeks run Monday-Sunday and are keyed by an integer
+# index (days since 1970-01-01, a Thursday, shifted by 3) so each row costs one
+# julianday() call; the Monday date is rendered once per group.
+TREND_SQL = """
+    SELECT 
+        DATE(wk * 7 - 3 + 2440587.5) as week_start,
+        COUNT(DISTINCT prospect_id) as leads,
+        COUNT(DISTINCT CASE WHEN contract_id IS NOT NULL THEN prospect_id END) as contracts,
+        COALESCE(SUM(contract_value), 0) as revenue,
+        ROUND(
+            CAST(COUNT(DISTINCT CASE WHEN contract_id IS NOT NULL THEN prospect_id END) AS FLOAT) / 
+            CAST(COUNT(DISTINCT prospect_id) AS FLOAT) * 100, 2
+        ) as conversion_rate
+    FROM (
+        SELECT 
+            (CAST(julianday(p.created_at) - 2440587.5 AS INTEGER) + 3) / 7 as wk,
+            p.prospect_id,
+            c.contract_id,
+            c.contract_value
+        FROM prospects p
+        LEFT JOIN contracts c ON p.prospect_id = c.prospect_id
+        WHERE p.created_at >= ? AND p.created_at < ?
+    )
+    GROUP BY wk
+    ORDER BY wk
+"""
+
+def _get_conn() -> sqlite3.Connection:
+    """Return this thread's SQLite connection, opening and tuning it on first use"""
+    if not hasattr(_CONN_POOL, 'conn'):
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        _CONN_POOL.conn = conn
+    return _CONN_POOL.conn
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(value: str) -> date:
+    """Parse a YYYY-MM-DD query parameter"""
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _range(default_days: int) -> Tuple[date, date]:
+    """Resolve the requested date range, defaulting to the last `default_days` days"""
+    end = date.today()
+    start_arg = request.args.get('start_date')
+    end_arg = request.args.get('end_date')
+    return (
+        _parse_date(start_arg) if start_arg else end - timedelta(days=default_days),
+        _parse_date(end_arg) if end_arg else end
+    )
+
+def _cacheable(rv) -> bool:
+    """Only cache successful responses; error paths return (response, status) tuples"""
+    return not isinstance(rv, tuple) and not g.get('engine_fallback', False)
+
+def _is_engine_fallback(result: Any) -> bool:
+    """Whether an engine result is the placeholder it returns after logging an error"""
+    if isinstance(result, tuple):
+        return any(_is_engine_fallback(item) for item in result)
+    if isinstance(result, ConversionMetrics):
+        return result is EMPTY_METRICS
+    if isinstance(result, pd.DataFrame):
+        # Successful queries always carry their result columns, even with no rows
+        return result.columns.empty
+    if isinstance(result, (list, dict)):
+        return not result
+    return False
+
+def _keep_result(result: Any) -> bool:
+    """Cache filter for engine results; a fallback also marks the request so its response isn't cached"""
+    if _is_engine_fallback(result):
+        g.engine_fallback = True
+        return False
+    return True
+
+def _records_fast(df: pd.DataFrame, cols: List[str] = None) -> List[Dict[str, Any]]:
+    """Column-wise equivalent of df.to_dict('records'), skipping pandas' per-row boxing"""
+    cols = cols or df.columns.tolist()
+    arrays = [df[c].to_numpy() for c in cols]
+    return [dict(zip(cols, row)) for row in zip(*arrays)]
+
+def _respond(payload: Dict[str, Any]):
+    """JSON by default; ?format=msgpack ships numpy series as typed binary instead of text"""
+    if request.args.get('format') == 'msgpack':
+        return Response(
+            ormsgpack.packb(payload, option=ormsgpack.OPT_SERIALIZE_NUMPY),
+            mimetype='application/x-msgpack'
+        )
+    return jsonify(payload)
+
+def _float_array(col: pd.Series) -> np.ndarray:
+    """Contiguous float64 view of a column, serialized natively by orjson"""
+    return np.ascontiguousarray(col.to_numpy(dtype=np.float64))
+
+@cache.memoize(API_CACHE_TIMEOUT, response_filter=_keep_result)
+def _cached_metrics(start_date: date, end_date: date) -> ConversionMetrics:
+    """Conversion metrics shared by the overview and funnel endpoints"""
+    return get_engine().calculate_conversion_rates((start_date, end_date))
+
+@cache.memoize(API_CACHE_TIMEOUT, response_filter=_keep_result)
+def _cached_source_performance(start_date: date, end_date: date) -> pd.DataFrame:
+    """Lead source performance shared by the lead-sources and export endpoints"""
+    return get_engine().get_lead_source_performance((start_date, end_date))
 
-# Initialize analytics engine
-analytics_engine = FunnelAnalyticsEngine("../database/funnel_analytics.db")
+@cache.memoize(API_CACHE_TIMEOUT, response_filter=_keep_result)
+def _cached_bottlenecks(start_date: date, end_date: date) -> List[BottleneckAnalysis]:
+    """Bottleneck analysis for the bottlenecks endpoint"""
+    return get_engine().identify_bottlenecks((start_date, end_date))
+
+@cache.memoize(API_CACHE_TIMEOUT, response_filter=_keep_result)
+def _cached_overview(start_date: date, end_date: date) -> Tuple[ConversionMetrics, pd.DataFrame, List[BottleneckAnalysis]]:
+    """Everything the overview endpoint needs, fetched in one engine call"""
+    return get_engine().overview_bundle((start_date, end_date))
 
 # ================================
 # DASHBOARD ROUTES
 # ================================
 
+@functools.lru_cache(maxsize=1)
+def _dashboard_html() -> str:
+    """The dashboard page is static, so render it once per process"""
+    return app.jinja_env.get_template('funnel_dashboard.html').render()
+
 @app.route('/')
 def dashboard():
     """Main dashboard page"""
-    return render_template('funnel_dashboard.html')
+    return Response(_dashboard_html(), mimetype='text/html',
+                    headers={'Cache-Control': 'public, max-age=300'})
 
 @app.route('/api/overview')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_overview():
     """Get funnel overview data"""
     try:
-        # Default to last 30 days
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
-        
-        # Get custom date range if provided
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
-        
-        # Calculate conversion metrics
-        metrics = analytics_engine.calculate_conversion_rates((start_date, end_date))
-        
-        # Get lead source performance
-        source_performance = analytics_engine.get_lead_source_performance((start_date, end_date))
+        start_date, end_date = _range(30)
         
-        # Get bottleneck analysis
-        bottlenecks = analytics_engine.identify_bottlenecks((start_date, end_date))
-        high_priority_bottlenecks = len([b for b in bottlenecks if b.bottleneck_severity == "HIGH"])
+        # Conversion metrics, lead source performance and bottlenecks from one read snapshot
+        metrics, source_performance, bottlenecks = _cached_overview(start_date, end_date)
+        high_priority_bottlenecks = Counter(b.bottleneck_severity for b in bottlenecks)["HIGH"]
         
         overview_data = {
             "date_range": {
@@ -67,21 +235,21 @@ def api_overview():
                 "discovery_calls_scheduled": metrics.discovery_calls_scheduled,
                 "proposals_sent": metrics.proposals_sent,
                 "contracts_signed": metrics.contracts_signed,
-                "total_revenue": f"${metrics.total_revenue:,.2f}",
-                "avg_deal_size": f"${metrics.avg_deal_size:,.2f}",
-                "overall_conversion_rate": f"{metrics.overall_conversion_rate:.1f}%",
-                "avg_sales_cycle_days": f"{metrics.avg_sales_cycle_days:.0f} days"
+                "total_revenue": metrics.total_revenue,
+                "avg_deal_size": metrics.avg_deal_size,
+                "overall_conversion_rate": metrics.overall_conversion_rate,
+                "avg_sales_cycle_days": metrics.avg_sales_cycle_days
             },
             "conversion_funnel": {
-                "lead_to_discovery": f"{metrics.lead_to_discovery_rate:.1f}%",
-                "discovery_to_proposal": f"{metrics.discovery_to_proposal_rate:.1f}%",
-                "proposal_to_contract": f"{metrics.proposal_to_contract_rate:.1f}%"
+                "lead_to_discovery": metrics.lead_to_discovery_rate,
+                "discovery_to_proposal": metrics.discovery_to_proposal_rate,
+                "proposal_to_contract": metrics.proposal_to_contract_rate
             },
             "alerts": {
                 "high_priority_bottlenecks": high_priority_bottlenecks,
-                "low_converting_sources": len(source_performance[source_performance['conversion_rate'] < 5]) if not source_performance.empty else 0
+                "low_converting_sources": int((source_performance['conversion_rate'].to_numpy(dtype=np.float64) < 5).sum()) if not source_performance.empty else 0
             },
-            "top_sources": source_performance.head(3).to_dict('records') if not source_performance.empty else []
+            "top_sources": _records_fast(source_performance.iloc[:3]) if not source_performance.empty else []
         }
         
         return jsonify(overview_data)
@@ -90,18 +258,26 @@ def api_overview():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/conversion-funnel')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_conversion_funnel():
     """Get conversion funnel visualization data"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
-        
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
-        
-        metrics = analytics_engine.calculate_conversion_rates((start_date, end_date))
+        start_date, end_date = _range(30)
+        
+        metrics = _cached_metrics(start_date, end_date)
+        
+        # Stage counts as a share of total leads, computed in one vectorized pass
+        vals = np.array([
+            metrics.total_leads,
+            metrics.discovery_calls_scheduled,
+            metrics.discovery_calls_completed,
+            metrics.proposals_sent,
+            metrics.contracts_signed
+        ], dtype=np.float64)
+        rates = np.zeros_like(vals)
+        np.divide(vals, vals[0], out=rates, where=vals[0] > 0)
+        rates *= 100
+        rates[0] = 100.0
         
         # Create funnel data
         funnel_data = {
@@ -119,13 +295,7 @@ def api_conversion_funnel():
                 metrics.proposals_sent,
                 metrics.contracts_signed
             ],
-            "conversion_rates": [
-                100.0,
-                metrics.lead_to_discovery_rate if metrics.total_leads > 0 else 0,
-                (metrics.discovery_calls_completed / metrics.total_leads * 100) if metrics.total_leads > 0 else 0,
-                (metrics.proposals_sent / metrics.total_leads * 100) if metrics.total_leads > 0 else 0,
-                metrics.overall_conversion_rate
-            ]
+            "conversion_rates": rates.tolist()
         }
         
         return jsonify(funnel_data)
@@ -134,42 +304,39 @@ def api_conversion_funnel():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/lead-sources')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_lead_sources():
     """Get lead source performance data"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=90)  # 90 days for lead sources
-        
-        if request.args.get('start_date'):
-            start_date = datetime.strpython(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        start_date, end_date = _range(90)  # 90 days for lead sources
         
-        source_performance = analytics_engine.get_lead_source_performance((start_date, end_date))
+        source_performance = _cached_source_performance(start_date, end_date)
         
         if source_performance.empty:
-            return jsonify({"sources": [], "charts": {}})
+            return _respond({"sources": [], "charts": {}})
         
-        # Prepare data for different visualizations
+        # Prepare data for different visualizations; the label list is shared by all charts
+        # and numeric series go to orjson as float64 arrays rather than boxed lists
+        labels = source_performance['source_name'].tolist()
         charts_data = {
             "revenue_by_source": {
-                "labels": source_performance['source_name'].tolist(),
-                "values": source_performance['total_revenue'].tolist(),
-                "colors": ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', '#82E0AA']
+                "labels": labels,
+                "values": _float_array(source_performance['total_revenue']),
+                "colors": _CHART_COLORS
             },
             "conversion_rates": {
-                "sources": source_performance['source_name'].tolist(),
-                "rates": source_performance['conversion_rate'].tolist()
+                "sources": labels,
+                "rates": _float_array(source_performance['conversion_rate'])
             },
             "roi_analysis": {
-                "sources": source_performance['source_name'].tolist(),
-                "roi": source_performance['roi'].tolist(),
-                "costs": source_performance['total_acquisition_cost'].tolist()
+                "sources": labels,
+                "roi": _float_array(source_performance['roi']),
+                "costs": _float_array(source_performance['total_acquisition_cost'])
             }
         }
         
-        return jsonify({
-            "sources": source_performance.to_dict('records'),
+        return _respond({
+            "sources": _records_fast(source_performance),
             "charts": charts_data
         })
         
@@ -177,18 +344,15 @@ def api_lead_sources():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/bottlenecks')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_bottlenecks():
     """Get bottleneck analysis data"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
+        start_date, end_date = _range(30)
         
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        bottlenecks = _cached_bottlenecks(start_date, end_date)
         
-        bottlenecks = analytics_engine.identify_bottlenecks((start_date, end_date))
+        severity_counts = Counter(b.bottleneck_severity for b in bottlenecks)
         
         bottleneck_data = []
         for bottleneck in bottlenecks:
@@ -204,9 +368,9 @@ def api_bottlenecks():
         return jsonify({
             "bottlenecks": bottleneck_data,
             "summary": {
-                "high_priority": len([b for b in bottlenecks if b.bottleneck_severity == "HIGH"]),
-                "medium_priority": len([b for b in bottlenecks if b.bottleneck_severity == "MEDIUM"]),
-                "low_priority": len([b for b in bottlenecks if b.bottleneck_severity == "LOW"])
+                "high_priority": severity_counts["HIGH"],
+                "medium_priority": severity_counts["MEDIUM"],
+                "low_priority": severity_counts["LOW"]
             }
         })
         
@@ -214,26 +378,22 @@ def api_bottlenecks():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/revenue-attribution')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_revenue_attribution():
     """Get revenue attribution analysis"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=90)
-        
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        start_date, end_date = _range(90)
         
         attribution_model = request.args.get('model', 'first_touch')
-        revenue_attribution = analytics_engine.calculate_revenue_attribution((start_date, end_date), attribution_model)
+        revenue_attribution = get_engine().calculate_revenue_attribution((start_date, end_date), attribution_model)
+        _keep_result(revenue_attribution)
         
         if revenue_attribution.empty:
             return jsonify({"attribution": [], "total_revenue": 0})
         
         return jsonify({
-            "attribution": revenue_attribution.to_dict('records'),
-            "total_revenue": revenue_attribution['total_attributed_revenue'].sum(),
+            "attribution": _records_fast(revenue_attribution),
+            "total_revenue": float(revenue_attribution['total_attributed_revenue'].to_numpy(dtype=np.float64, copy=False).sum()),
             "model": attribution_model,
             "chart_data": {
                 "labels": revenue_attribution['source_name'].tolist(),
@@ -246,18 +406,14 @@ def api_revenue_attribution():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/insights')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_insights():
     """Get comprehensive funnel insights"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
-        
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        start_date, end_date = _range(30)
         
-        insights = analytics_engine.generate_comprehensive_insights((start_date, end_date))
+        insights = get_engine().generate_comprehensive_insights((start_date, end_date))
+        _keep_result(insights)
         
         return jsonify(insights)
         
@@ -265,6 +421,7 @@ def api_insights():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/trends')
+@cache.cached(timeout=API_CACHE_TIMEOUT, query_string=True, response_filter=_cacheable)
 def api_trends():
     """Get funnel performance trends over time"""
     try:
@@ -272,28 +429,7 @@ def api_trends():
         end_date = date.today()
         start_date = end_date - timedelta(weeks=12)
         
-        conn = sqlite3.connect("../database/funnel_analytics.db")
-        
-        # Weekly conversion metrics
-        query = """
-            SELECT 
-                DATE(p.created_at, 'weekday 0', '-6 days') as week_start,
-                COUNT(DISTINCT p.prospect_id) as leads,
-                COUNT(DISTINCT CASE WHEN c.contract_id IS NOT NULL THEN p.prospect_id END) as contracts,
-                COALESCE(SUM(c.contract_value), 0) as revenue,
-                ROUND(
-                    CAST(COUNT(DISTINCT CASE WHEN c.contract_id IS NOT NULL THEN p.prospect_id END) AS FLOAT) / 
-                    CAST(COUNT(DISTINCT p.prospect_id) AS FLOAT) * 100, 2
-                ) as conversion_rate
-            FROM prospects p
-            LEFT JOIN contracts c ON p.prospect_id = c.prospect_id
-            WHERE p.created_at BETWEEN ? AND ?
-            GROUP BY DATE(p.created_at, 'weekday 0', '-6 days')
-            ORDER BY week_start
-        """
-        
-        df = pd.read_sql_query(query, conn, params=[start_date, end_date])
-        conn.close()
+        df = pd.read_sql_query(TREND_SQL, _get_conn(), params=(start_date, end_date + timedelta(days=1)))
         
         trends_data = {
             "weekly_trends": {
@@ -314,22 +450,16 @@ def api_trends():
 def api_export(report_type):
     """Export funnel data to CSV"""
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
-        
-        if request.args.get('start_date'):
-            start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
+        start_date, end_date = _range(30)
         
         filename = f"entelech_funnel_{report_type}_{start_date}_{end_date}.csv"
         
         if report_type == "lead_sources":
-            data = analytics_engine.get_lead_source_performance((start_date, end_date))
+            data = _cached_source_performance(start_date, end_date)
         elif report_type == "revenue_attribution":
-            data = analytics_engine.calculate_revenue_attribution((start_date, end_date))
+            data = get_engine().calculate_revenue_attribution((start_date, end_date))
         elif report_type == "comprehensive":
-            insights = analytics_engine.generate_comprehensive_insights((start_date, end_date))
+            insights = get_engine().generate_comprehensive_insights((start_date, end_date))
             # Convert insights to DataFrame for export
             data = pd.DataFrame([insights])
         else:
@@ -338,15 +468,37 @@ def api_export(report_type):
         if data.empty:
             return jsonify({"error": "No data available for export"}), 404
         
-        # Save to temp file and send
-        export_path = f"/tmp/{filename}"
-        data.to_csv(export_path, index=False)
+        if len(data) > EXPORT_STREAM_ROWS:
+            return Response(
+                stream_with_context(_iter_csv(data)),
+                mimetype='text/csv',
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+        
+        # Build CSV in memory and send
+        buf = io.BytesIO()
+        data.to_csv(buf, index=False)
+        buf.seek(0)
         
-        return send_file(export_path, as_attachment=True, download_name=filename)
+        return send_file(buf, mimetype='text/csv', as_attachment=True, download_name=filename)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _iter_csv(data: pd.DataFrame):
+    """Yield a DataFrame as CSV text, EXPORT_CHUNK_ROWS rows at a time"""
+    for start in range(0, len(data), EXPORT_CHUNK_ROWS):
+        yield data.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(index=False, header=(start == 0))
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def api_cache_invalidate():
+    """Drop cached analytics, e.g. from an ETL webhook after new data is loaded"""
+    token = request.headers.get('X-Cache-Invalidate-Token', '')
+    if not CACHE_INVALIDATE_TOKEN or not hmac.compare_digest(token.encode(), CACHE_INVALIDATE_TOKEN.encode()):
+        return jsonify({"error": "Invalid or missing cache invalidation token"}), 403
+    cache.clear()
+    return jsonify({"status": "cleared"})
+
 # ================================
 # ERROR HANDLERS
 # ================================
@@ -365,16 +517,21 @@ def internal_error(error):
 
 if __name__ == '__main__':
     # Ensure database exists
-    if not os.path.exists("../database/funnel_analytics.db"):
+    if not os.path.exists(DB_PATH):
         print("Warning: Database not found. Please run database initialization first.")
     
+    # Development server only; the reloader and debugger stay off unless explicitly requested.
+    # Production: gunicorn -w 4 --preload -k gthread --threads 8 funnel_dashboard:app
+    port = int(os.environ.get('DASHBOARD_PORT', 5001))
+    debug = os.environ.get('DASHBOARD_DEBUG', 'False').lower() in ('1', 'true', 'yes')
+    
     print("Starting Entelech Funnel Analytics Dashboard...")
-    print("Dashboard will be available at: http://localhost:5001")
+    print(f"Dashboard will be available at: http://localhost:{port}")
     print("API endpoints available at: /api/overview, /api/conversion-funnel, /api/lead-sources, etc.")
     
     app.run(
         host='0.0.0.0',
-        port=5001,
-        debug=True,
+        port=port,
+        debug=debug,
         threaded=True
     )
\ No newline at end of file
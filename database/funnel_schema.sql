@@ -11,7 +11,7 @@ USE entelech_funnel_analytics;
 -- Lead Sources and Attribution
 CREATE TABLE lead_sources (
     source_id INT PRIMARY KEY AUTO_INCREMENT,
-    source_name VARCHAR(100) NOT NULL,
+    source_name VARCHAR(100) NOT NULL UNIQUE,
     source_category ENUM('linkedin', 'referral', 'cold_outreach', 'website', 'social_media', 'event', 'other') NOT NULL,
     attribution_window_days INT DEFAULT 30,
     cost_per_lead DECIMAL(10,2) DEFAULT 0.00,
@@ -41,7 +41,7 @@ CREATE TABLE prospects (
 -- Funnel Stages Definition
 CREATE TABLE funnel_stages (
     stage_id INT PRIMARY KEY AUTO_INCREMENT,
-    stage_name VARCHAR(100) NOT NULL,
+    stage_name VARCHAR(100) NOT NULL UNIQUE,
     stage_order INT NOT NULL,
     stage_description TEXT,
     expected_duration_days INT DEFAULT 7,
@@ -5,32 +5,128 @@ Creates database tables and populates with sample data
 
 import sqlite3
 import os
+from urllib.request import pathname2url
 from datetime import datetime, timedelta, date
 import random
+import itertools
 from typing import List, Tuple
 import logging
+from contextlib import contextmanager
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bulk insert statements, each prepared once per executemany call
+INSERT_LEAD_SOURCE_SQL = """
+    INSERT INTO lead_sources (source_name, source_category, attribution_window_days, cost_per_lead)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(source_name) DO NOTHING
+"""
+
+INSERT_STAGE_SQL = """
+    INSERT INTO funnel_stages (stage_name, stage_order, stage_description, expected_duration_days)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(stage_name) DO NOTHING
+"""
+
+INSERT_PROSPECT_SQL = """
+    INSERT OR IGNORE INTO prospects (
+        first_name, last_name, email, company_name, job_title, phone, linkedin_url,
+        estimated_company_size, industry, lead_source_id, lead_score, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_JOURNEY_SQL = """
+    INSERT INTO prospect_journey (prospect_id, stage_id, entered_at, sales_rep)
+    VALUES (?, ?, ?, ?)
+"""
+
+INSERT_CALL_SQL = """
+    INSERT INTO discovery_calls (
+        prospect_id, scheduled_at, completed_at, call_duration_minutes,
+        call_status, pain_points, budget_range, decision_timeline,
+        qualification_score, sales_rep
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_PROPOSAL_SQL = """
+    INSERT INTO proposals (
+        proposal_id, prospect_id, proposal_amount, proposal_date, proposal_status,
+        service_type, implementation_timeline_months, monthly_retainer,
+        one_time_setup, proposal_sent_at, sales_rep
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_CONTRACT_SQL = """
+    INSERT INTO contracts (
+        prospect_id, proposal_id, contract_value, monthly_recurring_revenue,
+        contract_start_date, contract_status, payment_terms,
+        sales_rep, account_manager, signed_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class FunnelDatabaseInitializer:
     
     def __init__(self, db_path: str = "funnel_analytics.db"):
         """Initialize database connection"""
         self.db_path = db_path
         self.conn = None
+        self.ro_conn = None
         
     def connect(self):
         """Establish database connection"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Autocommit mode: transactions are opened explicitly via _transaction(); a larger
+            # statement cache keeps every bulk insert and schema statement compiled for the whole load
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=256)
             self.conn.execute("PRAGMA foreign_keys = ON")
+            # WAL with NORMAL sync avoids an fsync per insert during bulk population
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("PRAGMA temp_store = MEMORY")
+            self.conn.execute("PRAGMA cache_size = -65536")
+            self.conn.execute("PRAGMA mmap_size = 268435456")
             logger.info(f"Connected to database: {self.db_path}")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
     
+    def _read_connection(self) -> sqlite3.Connection:
+        """Read-only connection for reporting queries; in-memory databases only have the main one"""
+        if self.db_path == ":memory:":
+            return self.conn
+        if self.ro_conn is None:
+            self.ro_conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro", uri=True)
+        return self.ro_conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one explicit transaction, rolling back on error"""
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+    
+    @contextmanager
+    def _bulk_mode(self):
+        """Relax durability and FK enforcement for a bulk load, restoring and tidying up on exit"""
+        # PRAGMAs are no-ops inside a transaction, so these run between phases
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            yield
+        finally:
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("PRAGMA optimize")
+    
     def create_tables(self):
         """Create all required tables"""
         try:
@@ -42,21 +138,20 @@ class FunnelDatabaseInitializer:
                 with open(schema_path, 'r') as f:
                     schema_sql = f.read()
                     
-                # Execute schema in parts (SQLite doesn't handle multiple statements well)
-                for statement in schema_sql.split(';'):
-                    statement = statement.strip()
-                    if statement and not statement.startswith('--'):
-                        try:
-                            cursor.execute(statement)
-                        except sqlite3.Error as e:
-                            if "already exists" not in str(e):
-                                logger.warning(f"Schema statement failed: {e}")
+                # Run the whole schema in one executescript call; fall back to the built-in
+                # SQLite DDL if the file uses syntax SQLite rejects (e.g. the MySQL dialect)
+                try:
+                    self.conn.executescript(schema_sql)
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"Schema file could not be applied, creating tables directly: {e}")
+                    with self._transaction():
+                        self._create_tables_directly(cursor)
             
             # Create tables directly if schema file not found
             else:
-                self._create_tables_directly(cursor)
+                with self._transaction():
+                    self._create_tables_directly(cursor)
             
-            self.conn.commit()
             logger.info("Database tables created successfully")
             
         except Exception as e:
@@ -70,7 +165,7 @@ class FunnelDatabaseInitializer:
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS lead_sources (
                 source_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_name TEXT NOT NULL,
+                source_name TEXT NOT NULL UNIQUE,
                 source_category TEXT NOT NULL CHECK(source_category IN ('linkedin', 'referral', 'cold_outreach', 'website', 'social_media', 'event', 'other')),
                 attribution_window_days INTEGER DEFAULT 30,
                 cost_per_lead REAL DEFAULT 0.00,
@@ -104,7 +199,7 @@ class FunnelDatabaseInitializer:
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS funnel_stages (
                 stage_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stage_name TEXT NOT NULL,
+                stage_name TEXT NOT NULL UNIQUE,
                 stage_order INTEGER NOT NULL,
                 stage_description TEXT,
                 expected_duration_days INTEGER DEFAULT 7,
@@ -197,203 +292,268 @@ class FunnelDatabaseInitializer:
                 FOREIGN KEY (proposal_id) REFERENCES proposals(proposal_id)
             )
         """)
+        
+        # Seed data upserts on source and stage names. Databases created before these columns
+        # were declared UNIQUE may hold duplicate seed rows from repeated runs, so fold those into
+        # the lowest id per name before adding the equivalent unique index
+        self._merge_duplicate_names(cursor, "lead_sources", "source_id", "source_name",
+                                    ("prospects", "lead_source_id"))
+        self._merge_duplicate_names(cursor, "funnel_stages", "stage_id", "stage_name",
+                                    ("prospect_journey", "stage_id"))
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_lead_sources_name ON lead_sources(source_name)")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_funnel_stages_name ON funnel_stages(stage_name)")
+    
+    def _merge_duplicate_names(self, cursor, table: str, id_column: str, name_column: str,
+                               reference: Tuple[str, str]):
+        """Repoint references to duplicate-named rows at the lowest id per name, then delete the duplicates"""
+        ref_table, ref_column = reference
+        duplicates = f"SELECT {id_column} FROM {table} WHERE {id_column} NOT IN (SELECT MIN({id_column}) FROM {table} GROUP BY {name_column})"
+        
+        cursor.execute(f"""
+            UPDATE {ref_table}
+            SET {ref_column} = (
+                SELECT MIN(keep.{id_column})
+                FROM {table} keep
+                JOIN {table} dup ON dup.{name_column} = keep.{name_column}
+                WHERE dup.{id_column} = {ref_table}.{ref_column}
+            )
+            WHERE {ref_column} IN ({duplicates})
+        """)
+        repointed = cursor.rowcount
+        cursor.execute(f"DELETE FROM {table} WHERE {id_column} IN ({duplicates})")
+        
+        if cursor.rowcount:
+            logger.warning(f"Merged {cursor.rowcount} duplicate {table} rows by {name_column} "
+                           f"({repointed} {ref_table} references repointed)")
     
     def populate_sample_data(self):
         """Populate database with realistic sample data for testing"""
         try:
-            cursor = self.conn.cursor()
+            # Ids are minted here so rows are consistent by construction; FK checks are off for the
+            # load and verified once at the end
+            with self._bulk_mode():
+                cursor = self.conn.cursor()
+                
+                # Each phase commits on success and rolls back on error
+                with self._transaction():
+                    # Insert lead sources
+                    lead_sources = [
+                        ('LinkedIn Content Marketing', 'linkedin', 30, 15.00),
+                        ('LinkedIn Direct Outreach', 'linkedin', 7, 25.00),
+                        ('LinkedIn Ads', 'linkedin', 7, 45.00),
+                        ('Client Referrals', 'referral', 90, 0.00),
+                        ('Partner Referrals', 'referral', 60, 50.00),
+                        ('Cold Email Campaigns', 'cold_outreach', 14, 8.00),
+                        ('Cold Calling', 'cold_outreach', 7, 35.00),
+                        ('Website Organic', 'website', 30, 5.00),
+                        ('Website Contact Form', 'website', 1, 3.00),
+                        ('Industry Events', 'event', 60, 150.00),
+                        ('Word of Mouth', 'other', 90, 0.00)
+                    ]
             
-            # Insert lead sources
-            lead_sources = [
-                ('LinkedIn Content Marketing', 'linkedin', 30, 15.00),
-                ('LinkedIn Direct Outreach', 'linkedin', 7, 25.00),
-                ('LinkedIn Ads', 'linkedin', 7, 45.00),
-                ('Client Referrals', 'referral', 90, 0.00),
-                ('Partner Referrals', 'referral', 60, 50.00),
-                ('Cold Email Campaigns', 'cold_outreach', 14, 8.00),
-                ('Cold Calling', 'cold_outreach', 7, 35.00),
-                ('Website Organic', 'website', 30, 5.00),
-                ('Website Contact Form', 'website', 1, 3.00),
-                ('Industry Events', 'event', 60, 150.00),
-                ('Word of Mouth', 'other', 90, 0.00)
-            ]
+                    cursor.executemany(INSERT_LEAD_SOURCE_SQL, lead_sources)
             
-            cursor.executemany("""
-                INSERT OR IGNORE INTO lead_sources (source_name, source_category, attribution_window_days, cost_per_lead)
-                VALUES (?, ?, ?, ?)
-            """, lead_sources)
-            
-            # Insert funnel stages
-            funnel_stages = [
-                ('Lead Generated', 1, 'Initial lead capture and qualification', 1),
-                ('Discovery Call Scheduled', 2, 'Prospect agrees to discovery call', 3),
-                ('Discovery Call Completed', 3, 'Discovery call conducted and next steps defined', 1),
-                ('Proposal Sent', 4, 'Formal proposal sent to prospect', 7),
-                ('Proposal Under Review', 5, 'Prospect reviewing proposal and making decision', 14),
-                ('Contract Negotiation', 6, 'Terms and pricing being negotiated', 7),
-                ('Contract Signed', 7, 'Deal closed and contract executed', 1),
-                ('Lost/Disqualified', 8, 'Prospect dropped out or was disqualified', 0)
-            ]
+                    # Insert funnel stages
+                    funnel_stages = [
+                        ('Lead Generated', 1, 'Initial lead capture and qualification', 1),
+                        ('Discovery Call Scheduled', 2, 'Prospect agrees to discovery call', 3),
+                        ('Discovery Call Completed', 3, 'Discovery call conducted and next steps defined', 1),
+                        ('Proposal Sent', 4, 'Formal proposal sent to prospect', 7),
+                        ('Proposal Under Review', 5, 'Prospect reviewing proposal and making decision', 14),
+                        ('Contract Negotiation', 6, 'Terms and pricing being negotiated', 7),
+                        ('Contract Signed', 7, 'Deal closed and contract executed', 1),
+                        ('Lost/Disqualified', 8, 'Prospect dropped out or was disqualified', 0)
+                    ]
             
-            cursor.executemany("""
-                INSERT OR IGNORE INTO funnel_stages (stage_name, stage_order, stage_description, expected_duration_days)
-                VALUES (?, ?, ?, ?)
-            """, funnel_stages)
-            
-            # Generate sample prospects (last 90 days)
-            companies = [
-                'TechFlow Solutions', 'Digital Dynamics', 'InnovateCorp', 'Growth Partners',
-                'Alpha Industries', 'Beta Systems', 'Gamma Technologies', 'Delta Enterprises',
-                'Future Forward LLC', 'Smart Business Co', 'Efficiency Experts', 'ProcessPro Inc',
-                'AutomateNow Corp', 'Streamline Solutions', 'OptimalOps LLC', 'WorkflowWorks'
-            ]
+                    cursor.executemany(INSERT_STAGE_SQL, funnel_stages)
             
-            industries = [
-                'Technology', 'Healthcare', 'Finance', 'Manufacturing', 'Retail',
-                'Real Estate', 'Professional Services', 'Construction', 'Transportation', 'Education'
-            ]
+                # Generate sample prospects (last 90 days)
+                companies = [
+                    'TechFlow Solutions', 'Digital Dynamics', 'InnovateCorp', 'Growth Partners',
+                    'Alpha Industries', 'Beta Systems', 'Gamma Technologies', 'Delta Enterprises',
+                    'Future Forward LLC', 'Smart Business Co', 'Efficiency Experts', 'ProcessPro Inc',
+                    'AutomateNow Corp', 'Streamline Solutions', 'OptimalOps LLC', 'WorkflowWorks'
+                ]
             
-            first_names = ['John', 'Jane', 'Michael', 'Sarah', 'David', 'Lisa', 'Robert', 'Emma', 'James', 'Anna']
-            last_names = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez']
+                industries = [
+                    'Technology', 'Healthcare', 'Finance', 'Manufacturing', 'Retail',
+                    'Real Estate', 'Professional Services', 'Construction', 'Transportation', 'Education'
+                ]
             
-            sales_reps = ['Alex Thompson', 'Jordan Martinez', 'Casey Johnson', 'Morgan Davis']
+                first_names = ['John', 'Jane', 'Michael', 'Sarah', 'David', 'Lisa', 'Robert', 'Emma', 'James', 'Anna']
+                last_names = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez']
             
-            # Generate prospects over last 90 days
-            prospects_data = []
-            start_date = datetime.now() - timedelta(days=90)
+                sales_reps = ['Alex Thompson', 'Jordan Martinez', 'Casey Johnson', 'Morgan Davis']
             
-            for i in range(150):  # Generate 150 prospects
-                days_ago = random.randint(0, 90)
-                created_at = start_date + timedelta(days=days_ago)
-                
-                first_name = random.choice(first_names)
-                last_name = random.choice(last_names)
-                company = random.choice(companies)
-                industry = random.choice(industries)
-                source_id = random.randint(1, 11)  # Lead source IDs
-                lead_score = random.randint(10, 100)
-                
-                prospects_data.append((
-                    first_name, last_name, f"{first_name.lower()}.{last_name.lower()}@{company.replace(' ', '').lower()}.com",
-                    company, f"{random.choice(['CEO', 'CTO', 'VP Operations', 'Director', 'Manager'])}",
-                    f"555-{random.randint(100,999)}-{random.randint(1000,9999)}",
-                    f"https://linkedin.com/in/{first_name.lower()}-{last_name.lower()}",
-                    random.choice(['1-10', '11-50', '51-200', '201-500', '501-1000', '1000+']),
-                    industry, source_id, lead_score, created_at, created_at
-                ))
-            
-            cursor.executemany("""
-                INSERT OR IGNORE INTO prospects (
-                    first_name, last_name, email, company_name, job_title, phone, linkedin_url,
-                    estimated_company_size, industry, lead_source_id, lead_score, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, prospects_data)
-            
-            # Generate prospect journeys, discovery calls, proposals, and contracts
-            cursor.execute("SELECT prospect_id, created_at FROM prospects ORDER BY prospect_id")
-            prospects = cursor.fetchall()
-            
-            for prospect_id, created_at_str in prospects:
-                created_at = datetime.fromisoformat(created_at_str)
-                current_stage = 1
-                current_date = created_at
-                
-                # Simulate funnel progression with realistic drop-off rates
-                while current_stage <= 7:  # Max stage is Contract Signed (7)
-                    
-                    # Add to prospect_journey
+                # Generate prospects over last 90 days, sampling each column in one vectorized call
+                num_prospects = 150
+                start_date = datetime.now() - timedelta(days=90)
+                rng = np.random.default_rng()
+            
+                created_dates = [start_date + timedelta(days=days_ago)
+                                 for days_ago in rng.integers(0, 91, num_prospects).tolist()]
+                sampled_first = rng.choice(first_names, num_prospects).tolist()
+                sampled_last = rng.choice(last_names, num_prospects).tolist()
+                sampled_companies = rng.choice(companies, num_prospects).tolist()
+                sampled_industries = rng.choice(industries, num_prospects).tolist()
+                source_ids = rng.integers(1, 12, num_prospects).tolist()  # Lead source IDs
+                lead_scores = rng.integers(10, 101, num_prospects).tolist()
+                job_titles = rng.choice(['CEO', 'CTO', 'VP Operations', 'Director', 'Manager'], num_prospects).tolist()
+                phone_prefixes = rng.integers(100, 1000, num_prospects).tolist()
+                phone_suffixes = rng.integers(1000, 10000, num_prospects).tolist()
+                company_sizes = rng.choice(['1-10', '11-50', '51-200', '201-500', '501-1000', '1000+'], num_prospects).tolist()
+            
+                # Lower-cased names and email domains are formatted once per distinct value, not per row
+                lower_names = {name: name.lower() for name in first_names + last_names}
+                email_domains = {company: f"@{company.replace(' ', '').lower()}.com" for company in companies}
+            
+                prospects_data = [
+                    (
+                        first_name, last_name, f"{lower_names[first_name]}.{lower_names[last_name]}{email_domains[company]}",
+                        company, job_title,
+                        f"555-{phone_prefix}-{phone_suffix}",
+                        f"https://linkedin.com/in/{lower_names[first_name]}-{lower_names[last_name]}",
+                        company_size, industry, source_id, lead_score, created_at, created_at
+                    )
+                    for first_name, last_name, company, job_title, phone_prefix, phone_suffix,
+                        company_size, industry, source_id, lead_score, created_at in zip(
+                            sampled_first, sampled_last, sampled_companies, job_titles, phone_prefixes,
+                            phone_suffixes, company_sizes, sampled_industries, source_ids, lead_scores, created_dates
+                        )
+                ]
+            
+                # Drop duplicate emails up front (first wins, as INSERT OR IGNORE would) so inserted
+                # rows line up one-to-one with prospects_data
+                unique_prospects = {}
+                for row in prospects_data:
+                    unique_prospects.setdefault(row[2], row)
+                prospects_data = list(unique_prospects.values())
+            
+                with self._transaction():
+                    previous_max_id = cursor.execute("SELECT COALESCE(MAX(prospect_id), 0) FROM prospects").fetchone()[0]
+                    cursor.executemany(INSERT_PROSPECT_SQL, prospects_data)
+                    inserted = cursor.rowcount
+                    last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            
+                # Generate prospect journeys, discovery calls, proposals, and contracts for the prospects
+                # inserted above, pairing their ids with the creation times already in memory
+                if inserted == len(prospects_data):
+                    # AUTOINCREMENT ids within one transaction are contiguous
+                    prospects = [
+                        (prospect_id, row[11])
+                        for prospect_id, row in zip(range(last_id - inserted + 1, last_id + 1), prospects_data)
+                    ]
+                else:
+                    # Some emails already existed from an earlier run (ignored inserts can leave gaps in the
+                    # ids); look up the ids that were assigned
                     cursor.execute("""
-                        INSERT INTO prospect_journey (prospect_id, stage_id, entered_at, sales_rep)
-                        VALUES (?, ?, ?, ?)
-                    """, (prospect_id, current_stage, current_date, random.choice(sales_reps)))
-                    
-                    # Determine if prospect progresses based on realistic conversion rates
-                    progression_rates = {
-                        1: 0.65,  # Lead Generated -> Discovery Scheduled (65%)
-                        2: 0.80,  # Discovery Scheduled -> Discovery Completed (80%)
-                        3: 0.70,  # Discovery Completed -> Proposal Sent (70%)
-                        4: 0.85,  # Proposal Sent -> Proposal Review (85%)
-                        5: 0.40,  # Proposal Review -> Contract Negotiation (40%)
-                        6: 0.75   # Contract Negotiation -> Contract Signed (75%)
-                    }
-                    
-                    if current_stage == 7:  # Contract Signed
-                        break
+                        SELECT prospect_id, email FROM prospects
+                        WHERE prospect_id > ? ORDER BY prospect_id
+                    """, (previous_max_id,))
+                    prospects = [(prospect_id, unique_prospects[email][11]) for prospect_id, email in cursor.fetchall()]
+            
+                # Rows are collected across the whole simulation and written with one executemany per table;
+                # proposal ids are assigned client-side so contracts can reference them before insert
+                journey_rows = []
+                call_rows = []
+                proposal_rows = []
+                contract_rows = []
+                proposals_by_prospect = {}
+                cursor.execute("SELECT COALESCE(MAX(proposal_id), 0) FROM proposals")
+                proposal_id_counter = itertools.count(cursor.fetchone()[0] + 1)
+            
+                # Sales rep assignments drawn in one random.choices call; a prospect needs at most
+                # 11 (7 journey stages, 1 call, 1 proposal, 2 on the contract)
+                rep_draws = iter(random.choices(sales_reps, k=len(prospects) * 11))
+            
+                # Precompute each prospect's furthest stage in one pass: a prospect keeps progressing
+                # until its first failed draw against the stage conversion rate
+                progression_rates = np.array([
+                    0.65,  # Lead Generated -> Discovery Scheduled (65%)
+                    0.80,  # Discovery Scheduled -> Discovery Completed (80%)
+                    0.70,  # Discovery Completed -> Proposal Sent (70%)
+                    0.85,  # Proposal Sent -> Proposal Review (85%)
+                    0.40,  # Proposal Review -> Contract Negotiation (40%)
+                    0.75   # Contract Negotiation -> Contract Signed (75%)
+                ])
+                progresses = rng.random((len(prospects), len(progression_rates))) < progression_rates
+                max_stages = (1 + progresses.cumprod(axis=1).sum(axis=1)).tolist()
+                stage_gaps = rng.integers(1, 15, (len(prospects), len(progression_rates))).tolist()
+            
+                for (prospect_id, created_at), max_stage, gaps in zip(prospects, max_stages, stage_gaps):
+                    current_date = created_at
+                
+                    # Walk the stages this prospect reaches; max stage is Contract Signed (7)
+                    for current_stage in range(1, max_stage + 1):
                     
-                    if random.random() > progression_rates.get(current_stage, 0.5):
-                        # Prospect drops out
-                        break
+                        # Add to prospect_journey
+                        journey_rows.append((prospect_id, current_stage, current_date, next(rep_draws)))
                     
-                    # Generate stage-specific data
-                    if current_stage == 2:  # Discovery Call Scheduled
-                        scheduled_at = current_date + timedelta(days=random.randint(1, 7))
-                        completed = random.random() > 0.15  # 15% no-show rate
+                        # Generate stage-specific data for every stage reached, including the last one
+                        if current_stage == 2:  # Discovery Call Scheduled
+                            scheduled_at = current_date + timedelta(days=random.randint(1, 7))
+                            completed = random.random() > 0.15  # 15% no-show rate
                         
-                        cursor.execute("""
-                            INSERT INTO discovery_calls (
-                                prospect_id, scheduled_at, completed_at, call_duration_minutes,
-                                call_status, pain_points, budget_range, decision_timeline,
-                                qualification_score, sales_rep
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            prospect_id, scheduled_at,
-                            scheduled_at if completed else None,
-                            random.randint(30, 90) if completed else 0,
-                            'completed' if completed else 'no_show',
-                            'Process inefficiencies, manual tasks, scaling challenges' if completed else None,
-                            random.choice(['25k_50k', '50k_100k', '100k_plus', 'not_disclosed']) if completed else None,
-                            random.choice(['1_month', '3_months', '6_months']) if completed else None,
-                            random.randint(60, 95) if completed else 0,
-                            random.choice(sales_reps)
-                        ))
+                            call_rows.append((
+                                prospect_id, scheduled_at,
+                                scheduled_at if completed else None,
+                                random.randint(30, 90) if completed else 0,
+                                'completed' if completed else 'no_show',
+                                'Process inefficiencies, manual tasks, scaling challenges' if completed else None,
+                                random.choice(['25k_50k', '50k_100k', '100k_plus', 'not_disclosed']) if completed else None,
+                                random.choice(['1_month', '3_months', '6_months']) if completed else None,
+                                random.randint(60, 95) if completed else 0,
+                                next(rep_draws)
+                            ))
                     
-                    elif current_stage == 4:  # Proposal Sent
-                        proposal_date = current_date + timedelta(days=random.randint(1, 5))
-                        proposal_amount = random.randint(25000, 150000)
+                        elif current_stage == 4:  # Proposal Sent
+                            proposal_date = current_date + timedelta(days=random.randint(1, 5))
+                            proposal_amount = random.randint(25000, 150000)
+                            proposal_id = next(proposal_id_counter)
                         
-                        cursor.execute("""
-                            INSERT INTO proposals (
-                                prospect_id, proposal_amount, proposal_date, proposal_status,
-                                service_type, implementation_timeline_months, monthly_retainer,
-                                one_time_setup, proposal_sent_at, sales_rep
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            prospect_id, proposal_amount, proposal_date,
-                            random.choice(['sent', 'viewed', 'under_review']),
-                            random.choice(['automation_setup', 'ongoing_management', 'hybrid']),
-                            random.randint(3, 12),
-                            proposal_amount * 0.1,  # 10% monthly retainer
-                            proposal_amount * 0.3,  # 30% setup fee
-                            proposal_date, random.choice(sales_reps)
-                        ))
+                            proposal_rows.append((
+                                proposal_id, prospect_id, proposal_amount, proposal_date,
+                                random.choice(['sent', 'viewed', 'under_review']),
+                                random.choice(['automation_setup', 'ongoing_management', 'hybrid']),
+                                random.randint(3, 12),
+                                proposal_amount * 0.1,  # 10% monthly retainer
+                                proposal_amount * 0.3,  # 30% setup fee
+                                proposal_date, next(rep_draws)
+                            ))
+                            proposals_by_prospect[prospect_id] = (proposal_id, proposal_amount)
                     
-                    elif current_stage == 7:  # Contract Signed
-                        # Get the proposal for this prospect
-                        cursor.execute("SELECT proposal_id, proposal_amount FROM proposals WHERE prospect_id = ? ORDER BY proposal_date DESC LIMIT 1", (prospect_id,))
-                        proposal = cursor.fetchone()
+                        elif current_stage == 7:  # Contract Signed
+                            # Get the proposal for this prospect from the in-memory map (no per-contract table scan)
+                            proposal = proposals_by_prospect.get(prospect_id)
                         
-                        if proposal:
-                            proposal_id, proposal_amount = proposal
-                            contract_value = proposal_amount * random.uniform(0.9, 1.1)  # Some negotiation
-                            start_date = current_date + timedelta(days=random.randint(7, 30))
+                            if proposal:
+                                proposal_id, proposal_amount = proposal
+                                contract_value = proposal_amount * random.uniform(0.9, 1.1)  # Some negotiation
+                                start_date = current_date + timedelta(days=random.randint(7, 30))
                             
-                            cursor.execute("""
-                                INSERT INTO contracts (
-                                    prospect_id, proposal_id, contract_value, monthly_recurring_revenue,
-                                    contract_start_date, contract_status, payment_terms,
-                                    sales_rep, account_manager, signed_at
-                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                prospect_id, proposal_id, contract_value, contract_value * 0.1,
-                                start_date, 'active', random.choice(['monthly', 'quarterly']),
-                                random.choice(sales_reps), random.choice(sales_reps), current_date
-                            ))
+                                contract_rows.append((
+                                    prospect_id, proposal_id, contract_value, contract_value * 0.1,
+                                    start_date, 'active', random.choice(['monthly', 'quarterly']),
+                                    next(rep_draws), next(rep_draws), current_date
+                                ))
+                    
+                        if current_stage == max_stage:
+                            # Prospect drops out (or has signed)
+                            break
                     
-                    # Move to next stage
-                    current_stage += 1
-                    current_date += timedelta(days=random.randint(1, 14))
+                        # Move to next stage
+                        current_date += timedelta(days=gaps[current_stage - 1])
+            
+                with self._transaction():
+                    cursor.executemany(INSERT_JOURNEY_SQL, journey_rows)
+                    cursor.executemany(INSERT_CALL_SQL, call_rows)
+                    cursor.executemany(INSERT_PROPOSAL_SQL, proposal_rows)
+                    cursor.executemany(INSERT_CONTRACT_SQL, contract_rows)
+            
+                violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    raise sqlite3.IntegrityError(f"{len(violations)} foreign key violations in sample data")
             
-            self.conn.commit()
             logger.info("Sample data populated successfully")
             
         except Exception as e:
@@ -420,41 +580,49 @@ class FunnelDatabaseInitializer:
                 "CREATE INDEX IF NOT EXISTS idx_contracts_value ON contracts(contract_value)"
             ]
             
-            for index_sql in indexes:
-                cursor.execute(index_sql)
+            with self._transaction():
+                for index_sql in indexes:
+                    cursor.execute(index_sql)
             
-            self.conn.commit()
             logger.info("Database indexes created successfully")
             
         except Exception as e:
             logger.error(f"Error creating indexes: {e}")
             raise
     
+    def analyze(self):
+        """Refresh query planner statistics once the bulk load and indexes are in place"""
+        try:
+            self.conn.execute("ANALYZE")
+            self.conn.execute("PRAGMA optimize")
+            logger.info("Database statistics analyzed successfully")
+            
+        except Exception as e:
+            logger.error(f"Error analyzing database: {e}")
+            raise
+    
     def get_database_stats(self):
         """Get statistics about the created database"""
         try:
-            cursor = self.conn.cursor()
-            
-            stats = {}
+            cursor = self._read_connection().cursor()
             
-            # Count records in each table
+            # Count records in each table with a single UNION ALL query
             tables = ['lead_sources', 'prospects', 'funnel_stages', 'prospect_journey', 
                      'discovery_calls', 'proposals', 'contracts']
             
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                stats[table] = cursor.fetchone()[0]
+            cursor.execute(" UNION ALL ".join(
+                f"SELECT '{table}', COUNT(*) FROM {table}" for table in tables
+            ))
+            stats = dict(cursor.fetchall())
             
             # Calculate some business metrics
-            cursor.execute("SELECT COUNT(*) FROM contracts WHERE contract_status = 'active'")
-            stats['active_contracts'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT SUM(contract_value) FROM contracts WHERE contract_status = 'active'")
-            total_revenue = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT COUNT(*), SUM(contract_value), AVG(contract_value)
+                FROM contracts WHERE contract_status = 'active'
+            """)
+            active_contracts, total_revenue, avg_deal_size = cursor.fetchone()
+            stats['active_contracts'] = active_contracts
             stats['total_revenue'] = total_revenue if total_revenue else 0
-            
-            cursor.execute("SELECT AVG(contract_value) FROM contracts WHERE contract_status = 'active'")
-            avg_deal_size = cursor.fetchone()[0]
             stats['avg_deal_size'] = avg_deal_size if avg_deal_size else 0
             
             return stats
@@ -463,8 +631,25 @@ class FunnelDatabaseInitializer:
             logger.error(f"Error getting database stats: {e}")
             return {}
     
+    def backup_to(self, target_path: str):
+        """Copy the current database to `target_path` in one pass using SQLite's backup API"""
+        try:
+            target = sqlite3.connect(target_path)
+            try:
+                self.conn.backup(target)
+                target.execute("PRAGMA journal_mode = WAL")
+            finally:
+                target.close()
+            logger.info(f"Database written to: {target_path}")
+            
+        except Exception as e:
+            logger.error(f"Error writing database backup: {e}")
+            raise
+    
     def close(self):
         """Close database connection"""
+        if self.ro_conn:
+            self.ro_conn.close()
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed")
@@ -473,8 +658,11 @@ def main():
     """Main initialization function"""
     print("🚀 Initializing Entelech Funnel Analytics Database...")
     
-    # Initialize database
-    db_init = FunnelDatabaseInitializer()
+    # Initialize database. A fresh database is seeded in memory and written to disk once at the
+    # end, since a failed first run can simply be repeated; existing databases are updated in place.
+    db_path = "funnel_analytics.db"
+    first_init = not os.path.exists(db_path)
+    db_init = FunnelDatabaseInitializer(":memory:" if first_init else db_path)
     
     try:
         # Connect to database
@@ -492,6 +680,14 @@ def main():
         print("⚡ Creating database indexes...")
         db_init.create_indexes()
         
+        # Gather planner statistics for the dashboard queries
+        print("🔍 Analyzing database...")
+        db_init.analyze()
+        
+        if first_init:
+            print(f"💾 Writing database to {db_path}...")
+            db_init.backup_to(db_path)
+        
         # Get and display statistics
         print("📈 Database Statistics:")
         stats = db_init.get_database_stats()
@@ -3,7 +3,13 @@ Entelech Funnel Analytics Engine
 Comprehensive lead tracking and conversion rate analysis system
 """
 
+import copy
+import os
 import sqlite3
+import threading
+import functools
+from itertools import islice
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
@@ -11,6 +17,7 @@ from typing import Dict, List, Tuple, Optional, Any
 import json
 import logging
 from dataclasses import dataclass
+from contextlib import contextmanager
 from enum import Enum
 
 # Configure logging
@@ -40,7 +47,20 @@ class FunnelStage(Enum):
     CONTRACT_SIGNED = "contract_signed"
     LOST_DISQUALIFIED = "lost_disqualified"
 
-@dataclass
+class CallStatus(Enum):
+    SCHEDULED = "scheduled"
+    COMPLETED = "completed"
+    NO_SHOW = "no_show"
+    CANCELLED = "cancelled"
+    RESCHEDULED = "rescheduled"
+
+class ContractStatus(Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    PAUSED = "paused"
+
+@dataclass(frozen=True, slots=True)
 class ConversionMetrics:
     total_leads: int
     discovery_calls_scheduled: int
@@ -56,6 +76,13 @@ class ConversionMetrics:
     overall_conversion_rate: float
     cost_per_acquisition: float
     lifetime_value: float
+    # Run rates over the inclusive window's day count, (end - start) + 1
+    daily_leads: float = 0.0
+    daily_revenue: float = 0.0
+
+# Returned when a conversion query fails; safe to share since the dataclass is frozen, and
+# callers can tell it apart from a real zero-lead window by identity
+EMPTY_METRICS = ConversionMetrics(0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
 
 @dataclass
 class BottleneckAnalysis:
@@ -66,30 +93,463 @@ class BottleneckAnalysis:
     bottleneck_severity: str
     recommendations: List[str]
 
+# Join/filter keys used by the analytics queries; trailing columns make them
+# covering so the per-prospect rollups and stage scans never touch the tables
+ANALYTICS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_prospects_source_created ON prospects(lead_source_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_calls_prospect_status ON discovery_calls(prospect_id, call_status)",
+    "CREATE INDEX IF NOT EXISTS idx_proposals_prospect ON proposals(prospect_id)",
+    "CREATE INDEX IF NOT EXISTS idx_contracts_prospect_cover ON contracts(prospect_id, contract_status, signed_at, contract_value)",
+    "CREATE INDEX IF NOT EXISTS idx_contracts_signed_cover ON contracts(signed_at, contract_status, prospect_id, contract_value)",
+    "CREATE INDEX IF NOT EXISTS idx_journey_stage_cover ON prospect_journey(stage_id, entered_at, exited_at, prospect_id)",
+    "CREATE INDEX IF NOT EXISTS idx_journey_entered_cover ON prospect_journey(entered_at, stage_id, exited_at, prospect_id)",
+)
+
+# Backs the source upsert; fails on older databases that hold duplicate source names
+LEAD_SOURCE_NAME_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_lead_sources_name ON lead_sources(source_name)"
+
+BOTTLENECK_FETCH_SIZE = 256
+
+# julianday() of 1970-01-01 00:00 UTC, for binding "now" from time.time()
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# Get-or-create in one statement; the no-op update lets RETURNING yield existing ids too
+UPSERT_LEAD_SOURCE_SQL = """
+    INSERT INTO lead_sources (source_name, source_category, attribution_window_days, cost_per_lead)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(source_name) DO UPDATE SET source_name = excluded.source_name
+    RETURNING source_id
+"""
+
+# Fallback get-or-create when source names aren't unique; duplicates resolve to the lowest id
+SELECT_LEAD_SOURCE_ID_SQL = "SELECT MIN(source_id) AS source_id FROM lead_sources WHERE source_name = ?"
+INSERT_LEAD_SOURCE_SQL = """
+    INSERT INTO lead_sources (source_name, source_category, attribution_window_days, cost_per_lead)
+    VALUES (?, ?, ?, ?)
+"""
+
+INSIGHTS_CACHE_SIZE = 32
+
+UPDATE_PROSPECT_SOURCE_SQL = """
+    UPDATE prospects 
+    SET lead_source_id = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE email = ?
+"""
+
+# Child tables are rolled up per prospect before joining so calls, proposals
+# and contracts don't multiply each other's rows (and revenue) per lead
+LEAD_SOURCE_PERFORMANCE_SQL = """
+    WITH prospect_calls AS (
+        SELECT prospect_id, COUNT(*) as call_count
+        FROM discovery_calls
+        GROUP BY prospect_id
+    ),
+    prospect_proposals AS (
+        SELECT prospect_id, COUNT(*) as proposal_count
+        FROM proposals
+        GROUP BY prospect_id
+    ),
+    prospect_contracts AS (
+        SELECT prospect_id, COUNT(*) as contract_count, SUM(contract_value) as revenue
+        FROM contracts
+        GROUP BY prospect_id
+    )
+    SELECT 
+        ls.source_name,
+        ls.source_category,
+        ls.cost_per_lead,
+        COUNT(p.prospect_id) as total_leads,
+        COALESCE(SUM(pc.call_count), 0) as discovery_calls,
+        COALESCE(SUM(pp.proposal_count), 0) as proposals_sent,
+        COALESCE(SUM(pk.contract_count), 0) as contracts_signed,
+        COALESCE(SUM(pk.revenue), 0) as total_revenue,
+        COALESCE(SUM(pk.revenue) / SUM(pk.contract_count), 0) as avg_deal_size,
+        ROUND(
+            CAST(COALESCE(SUM(pk.contract_count), 0) AS FLOAT) / 
+            CAST(COUNT(p.prospect_id) AS FLOAT) * 100, 2
+        ) as conversion_rate,
+        COALESCE(SUM(pk.revenue), 0) / COUNT(p.prospect_id) as revenue_per_lead,
+        (ls.cost_per_lead * COUNT(p.prospect_id)) as total_acquisition_cost
+    FROM lead_sources ls
+    LEFT JOIN prospects p ON ls.source_id = p.lead_source_id 
+        AND p.created_at >= ? AND p.created_at < ?
+    LEFT JOIN prospect_calls pc ON p.prospect_id = pc.prospect_id
+    LEFT JOIN prospect_proposals pp ON p.prospect_id = pp.prospect_id
+    LEFT JOIN prospect_contracts pk ON p.prospect_id = pk.prospect_id
+    WHERE ls.is_active = 1
+    GROUP BY ls.source_id, ls.source_name, ls.source_category, ls.cost_per_lead
+    ORDER BY total_revenue DESC, total_leads DESC
+"""
+
+# Funnel metrics: one row of stage flags per prospect, then summed, so
+# calls/proposals/contracts never fan out against each other
+_CONTRACT_ROLLUP_CTE = """
+    WITH prospect_contracts AS (
+        SELECT 
+            prospect_id,
+            COUNT(*) as contract_count,
+            SUM(contract_value) as revenue,
+            COUNT(signed_at) as signed_count,
+            SUM(julianday(signed_at)) as signed_days
+        FROM contracts
+        GROUP BY prospect_id
+    )
+"""
+
+_FUNNEL_TOTALS = """
+        COUNT(*) as total_leads,
+        SUM(has_call) as discovery_scheduled,
+        SUM(has_completed_call) as discovery_completed,
+        SUM(has_proposal) as proposals_sent,
+        SUM(contract_count IS NOT NULL) as contracts_signed,
+        COALESCE(SUM(revenue), 0) as total_revenue,
+        SUM(contract_count) as contract_total,
+        SUM(signed_count) as signed_total,
+        SUM(cycle_days) as cycle_days_total
+"""
+
+_PROSPECT_FUNNEL_FLAGS = """
+        SELECT 
+            p.lead_source_id,
+            EXISTS(SELECT 1 FROM discovery_calls dc WHERE dc.prospect_id = p.prospect_id) as has_call,
+            EXISTS(
+                SELECT 1 FROM discovery_calls dc 
+                WHERE dc.prospect_id = p.prospect_id AND dc.call_status = ?
+            ) as has_completed_call,
+            EXISTS(SELECT 1 FROM proposals pr WHERE pr.prospect_id = p.prospect_id) as has_proposal,
+            pc.contract_count,
+            pc.revenue,
+            pc.signed_count,
+            pc.signed_days - pc.signed_count * julianday(p.created_at) as cycle_days
+        FROM prospects p
+        LEFT JOIN prospect_contracts pc ON p.prospect_id = pc.prospect_id
+        WHERE p.created_at >= ? AND p.created_at < ? {source_filter}
+"""
+
+CONVERSION_RATES_SQL = (
+    _CONTRACT_ROLLUP_CTE
+    + f"SELECT {_FUNNEL_TOTALS} FROM ({_PROSPECT_FUNNEL_FLAGS.format(source_filter='')})"
+)
+
+CONVERSION_RATES_FOR_SOURCE_SQL = (
+    _CONTRACT_ROLLUP_CTE
+    + f"SELECT {_FUNNEL_TOTALS} FROM ({_PROSPECT_FUNNEL_FLAGS.format(source_filter='AND p.lead_source_id = ?')})"
+)
+
+CONVERSION_RATES_PER_SOURCE_SQL = (
+    _CONTRACT_ROLLUP_CTE
+    + f"""
+    SELECT 
+        ls.source_id,
+        ls.cost_per_lead,
+        {_FUNNEL_TOTALS}
+    FROM ({_PROSPECT_FUNNEL_FLAGS.format(source_filter='')}) flags
+    JOIN lead_sources ls ON ls.source_id = flags.lead_source_id
+    GROUP BY ls.source_id, ls.cost_per_lead
+    ORDER BY ls.source_id
+    """
+)
+
+SOURCE_COST_SQL = "SELECT cost_per_lead FROM lead_sources WHERE source_id = ?"
+
+AVERAGE_COST_PER_LEAD_SQL = """
+    SELECT AVG(ls.cost_per_lead) as avg_cost
+    FROM lead_sources ls
+    JOIN prospects p ON ls.source_id = p.lead_source_id
+    WHERE p.created_at >= ? AND p.created_at < ?
+"""
+
+# Stage performance. Each journey row's age is computed once against a bound
+# "now" and shared by the duration average and the stuck count
+STAGE_PERFORMANCE_SQL = """
+    SELECT 
+        fs.stage_name,
+        fs.stage_order,
+        fs.expected_duration_days,
+        stage_agg.prospects_entered,
+        stage_agg.prospects_exited,
+        stage_agg.avg_duration_days,
+        stage_agg.prospects_stuck
+    FROM funnel_stages fs
+    LEFT JOIN (
+        SELECT 
+            stage_id,
+            COUNT(DISTINCT prospect_id) as prospects_entered,
+            COUNT(DISTINCT CASE WHEN exited_at IS NOT NULL THEN prospect_id END) as prospects_exited,
+            AVG(duration_days) as avg_duration_days,
+            COUNT(DISTINCT CASE WHEN exited_at IS NULL AND duration_days > expected_duration_days THEN prospect_id END) as prospects_stuck
+        FROM (
+            SELECT 
+                pj.stage_id,
+                pj.prospect_id,
+                pj.exited_at,
+                COALESCE(julianday(pj.exited_at), ?) - julianday(pj.entered_at) as duration_days,
+                s.expected_duration_days
+            FROM prospect_journey pj
+            JOIN funnel_stages s ON s.stage_id = pj.stage_id
+            WHERE pj.entered_at >= ? AND pj.entered_at < ?
+        )
+        GROUP BY stage_id
+    ) stage_agg ON stage_agg.stage_id = fs.stage_id
+    WHERE fs.stage_name != 'Lost/Disqualified'
+    ORDER BY fs.stage_order
+"""
+
+# Contracts aggregated per lead source, already sorted by revenue contribution
+REVENUE_ATTRIBUTION_SQL = """
+    SELECT 
+        ls.source_name,
+        ls.source_category,
+        SUM(c.contract_value) as total_attributed_revenue,
+        AVG(c.contract_value) as avg_deal_size,
+        COUNT(*) as total_contracts,
+        SUM(c.monthly_recurring_revenue) as total_mrr,
+        AVG(julianday(c.signed_at) - julianday(p.created_at)) as avg_sales_cycle_days,
+        SUM(c.contract_value) * 100.0 / SUM(SUM(c.contract_value)) OVER () as revenue_percentage
+    FROM contracts c
+    JOIN prospects p ON c.prospect_id = p.prospect_id
+    JOIN lead_sources ls ON p.lead_source_id = ls.source_id
+    WHERE c.signed_at >= ? AND c.signed_at < ?
+        AND c.contract_status = ?
+    GROUP BY ls.source_id, ls.source_name, ls.source_category
+    ORDER BY total_attributed_revenue DESC, ls.source_name
+"""
+
+def _compute_rates(total_leads: np.ndarray, discovery_scheduled: np.ndarray,
+                   discovery_completed: np.ndarray, proposals_sent: np.ndarray,
+                   contracts_signed: np.ndarray, total_revenue: np.ndarray,
+                   contract_total: np.ndarray, signed_total: np.ndarray,
+                   cycle_days_total: np.ndarray, cost_per_lead: np.ndarray) -> Dict[str, np.ndarray]:
+    """Derived funnel ratios for arrays of per-group totals; zero wherever the denominator is zero"""
+    def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        return np.divide(numerator, denominator, out=np.zeros(len(denominator)), where=denominator > 0)
+    
+    return {
+        "avg_deal_size": ratio(total_revenue, contract_total),
+        "avg_sales_cycle_days": ratio(cycle_days_total, signed_total),
+        "lead_to_discovery_rate": ratio(discovery_scheduled, total_leads) * 100,
+        "discovery_to_proposal_rate": ratio(proposals_sent, discovery_completed) * 100,
+        "proposal_to_contract_rate": ratio(contracts_signed, proposals_sent) * 100,
+        "overall_conversion_rate": ratio(contracts_signed, total_leads) * 100,
+        "cost_per_acquisition": ratio(cost_per_lead * total_leads, contracts_signed),
+    }
+
+def _to_records(df: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+    """Same output as df[columns].to_dict('records'), built column-wise without the row-wise frame"""
+    values = [df[column].tolist() for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+# Bottleneck condition bits returned by _bottleneck_flags
+FLAG_LOW_CONVERSION = 1
+FLAG_SLOW_STAGE = 2
+FLAG_STALLED = 4
+
+def _bottleneck_flags(conversion_rates: np.ndarray, duration_factors: np.ndarray,
+                      stuck_factors: np.ndarray) -> np.ndarray:
+    """Bitmask of triggered bottleneck conditions for every stage at once"""
+    flags = np.where(conversion_rates < 50, FLAG_LOW_CONVERSION, 0).astype(np.uint8)
+    flags |= np.where(duration_factors > 2, FLAG_SLOW_STAGE, 0).astype(np.uint8)
+    flags |= np.where(stuck_factors > 0.3, FLAG_STALLED, 0).astype(np.uint8)
+    return flags
+
+_STAGE_RECS: Dict[str, Tuple[str, ...]] = {
+    "Lead Generated": (
+        "Implement lead scoring to prioritize high-quality prospects",
+        "Create automated qualification sequences",
+        "Review lead source quality and adjust targeting"
+    ),
+    "Discovery Call Scheduled": (
+        "Improve initial outreach messaging and value proposition",
+        "Implement calendar booking automation",
+        "Create urgency with limited-time offers or consultations"
+    ),
+    "Discovery Call Completed": (
+        "Reduce no-show rates with confirmation sequences",
+        "Train sales team on discovery call best practices",
+        "Implement call recording and analysis for improvement"
+    ),
+    "Proposal Sent": (
+        "Streamline discovery-to-proposal process",
+        "Create proposal templates for faster turnaround",
+        "Implement better qualification to ensure proposal-ready prospects"
+    ),
+    "Proposal Under Review": (
+        "Create structured follow-up sequences",
+        "Implement proposal tracking and engagement analytics",
+        "Add social proof and case studies to proposals"
+    ),
+    "Contract Negotiation": (
+        "Streamline contract terms and reduce complexity",
+        "Train team on objection handling and negotiation",
+        "Create flexible pricing options and packages"
+    )
+}
+
+@functools.lru_cache(maxsize=2048)
+def _format_strategic_recommendations(critical_conversion: bool, weak_conversion: bool,
+                                      top_source: Optional[Tuple[str, int]], low_count: int,
+                                      primary_bottleneck: Optional[Tuple[str, str]],
+                                      long_sales_cycle: bool) -> Tuple[str, ...]:
+    """Top 5 strategic recommendation strings for one combination of displayed values"""
+    # (applies, template, format args) in priority order
+    candidates = (
+        (critical_conversion,
+         "CRITICAL: Overall conversion rate is below 5%. Focus on lead qualification and sales process optimization.", ()),
+        (weak_conversion,
+         "Conversion rate needs improvement. Consider implementing lead scoring and nurturing sequences.", ()),
+        (top_source is not None,
+         "Scale investment in {} - showing excellent ROI of {}%", top_source),
+        (low_count > 0,
+         "Consider pausing or optimizing {} underperforming lead sources", (low_count,)),
+        (primary_bottleneck is not None,
+         "Address {} bottleneck - {}", primary_bottleneck),
+        (long_sales_cycle,
+         "Sales cycle is lengthy. Implement urgency tactics and streamline decision-making process.", ()),
+    )
+    recommendations = [template.format(*args) for applies, template, args in candidates if applies]
+    
+    return tuple(recommendations[:5])  # Return top 5 recommendations
+
+# Lead source condition bits returned by _classify_sources
+SOURCE_FLAG_LOW_CONVERSION = 1
+SOURCE_FLAG_HIGH_ROI = 2
+
+def _classify_sources(roi: np.ndarray, conversion_rates: np.ndarray) -> np.ndarray:
+    """Bitmask of recommendation-worthy conditions for every lead source at once"""
+    flags = np.where(conversion_rates < 2, SOURCE_FLAG_LOW_CONVERSION, 0).astype(np.int8)
+    flags |= np.where(roi > 200, SOURCE_FLAG_HIGH_ROI, 0).astype(np.int8)
+    return flags
+
+@functools.lru_cache(maxsize=128)
+def _bottleneck_recommendations(stage_name: str, flags: int) -> Tuple[str, ...]:
+    """Recommendations for a stage; depends only on the stage and its bottleneck flags"""
+    recommendations = []
+    
+    # Add stage-specific recommendations
+    recommendations.extend(_STAGE_RECS.get(stage_name, ()))
+    
+    # Add performance-specific recommendations
+    if flags & FLAG_LOW_CONVERSION:
+        recommendations.append("URGENT: Review and improve qualification criteria")
+        recommendations.append("Analyze lost prospects for common patterns")
+    
+    if flags & FLAG_SLOW_STAGE:
+        recommendations.append("Implement automated follow-up sequences")
+        recommendations.append("Set clear timelines and next steps with prospects")
+    
+    if flags & FLAG_STALLED:
+        recommendations.append("Create re-engagement campaigns for stalled prospects")
+        recommendations.append("Implement stage-specific nurturing content")
+    
+    return tuple(islice(recommendations, 5))  # Limit to top 5 recommendations
+
+
 class FunnelAnalyticsEngine:
     
     def __init__(self, db_path: str = "funnel_analytics.db"):
         """Initialize the funnel analytics engine with database connection"""
         self.db_path = db_path
-        self.conn = None
+        self._local = threading.local()
+        self._indexes_ready = False
+        self._source_names_unique = False
+        self._insights_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._insights_lock = threading.Lock()
         self._connect_database()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread, so concurrent requests don't share one handle"""
+        if getattr(self._local, 'conn', None) is None:
+            self._connect_database()
+        return self._local.conn
         
     def _connect_database(self):
         """Establish database connection and create tables if needed"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
             logger.info(f"Connected to database: {self.db_path}")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
+        
+        if not self._indexes_ready:
+            self._ensure_indexes(conn)
+    
+    def _ensure_indexes(self, conn: sqlite3.Connection):
+        """Create the analytics indexes and collect planner stats if they were never gathered"""
+        try:
+            for statement in ANALYTICS_INDEXES:
+                conn.execute(statement)
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+                conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+            self._indexes_ready = True
+        except sqlite3.Error as e:
+            # Missing tables or a read-only file; queries still work, just without the indexes
+            logger.warning(f"Could not create analytics indexes: {e}")
+        
+        try:
+            conn.execute(LEAD_SOURCE_NAME_INDEX)
+            conn.commit()
+            self._source_names_unique = True
+        except sqlite3.Error as e:
+            # Duplicate source names (see init_database.py); lead sources are resolved without the upsert
+            logger.warning(f"Could not create unique lead source name index: {e}")
     
     def close_connection(self):
         """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        conn = getattr(self._local, 'conn', None)
+        if conn:
+            try:
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f"PRAGMA optimize failed on close: {e}")
+            conn.close()
+            self._local.conn = None
             logger.info("Database connection closed")
     
+    def data_version(self) -> Optional[Tuple[float, float]]:
+        """
+        Cheap change marker for caching results derived from the database
+        
+        Returns:
+            Modification times of the database and its WAL file, or None for in-memory databases
+        """
+        try:
+            db_mtime = os.path.getmtime(self.db_path)
+        except OSError:
+            return None
+        wal_path = f"{self.db_path}-wal"
+        wal_mtime = os.path.getmtime(wal_path) if os.path.exists(wal_path) else 0.0
+        return db_mtime, wal_mtime
+    
+    @staticmethod
+    def _window_bounds(date_range: Tuple[date, date]) -> Tuple[date, date]:
+        """Half-open [start, end + 1 day) bounds, so timestamps on the end date are included"""
+        return date_range[0], date_range[1] + timedelta(days=1)
+    
+    @staticmethod
+    def _window_days(date_range: Tuple[date, date]) -> int:
+        """Number of days covered by the _window_bounds window, counting both end dates"""
+        return (date_range[1] - date_range[0]).days + 1
+    
+    def _read_frame(self, query: str, params: List[Any]) -> pd.DataFrame:
+        """Run a query into a DataFrame straight from plain tuple rows"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+    
     # ================================
     # LEAD SOURCE ATTRIBUTION
     # ================================
@@ -107,40 +567,63 @@ class FunnelAnalyticsEngine:
         Returns:
             bool: Success status
         """
+        return self.track_lead_sources_bulk([(prospect_email, source_name, attribution_data)])
+    
+    def track_lead_sources_bulk(self, rows: List[Tuple[str, str, Dict[str, Any]]]) -> bool:
+        """
+        Track lead source attribution for many prospects in one write transaction
+        
+        Args:
+            rows: List of (prospect_email, source_name, attribution_data) tuples
+            
+        Returns:
+            bool: Success status
+        """
+        if not rows:
+            return True
+        
+        conn = self.conn
         try:
-            cursor = self.conn.cursor()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
             
-            # Get or create lead source
-            cursor.execute("""
-                SELECT source_id FROM lead_sources 
-                WHERE source_name = ?
-            """, (source_name,))
-            
-            source_result = cursor.fetchone()
-            if not source_result:
-                # Create new lead source
-                cursor.execute("""
-                    INSERT INTO lead_sources (source_name, source_category, attribution_window_days, cost_per_lead)
-                    VALUES (?, ?, ?, ?)
-                """, (source_name, attribution_data.get('category', 'other'), 
-                     attribution_data.get('attribution_window', 30),
-                     attribution_data.get('cost_per_lead', 0.0)))
-                source_id = cursor.lastrowid
-            else:
-                source_id = source_result['source_id']
+            # Get or create each distinct lead source
+            attribution_by_source = {}
+            for _, source_name, attribution_data in rows:
+                attribution_by_source.setdefault(source_name, attribution_data)
+            
+            source_ids = {}
+            for source_name, attribution_data in attribution_by_source.items():
+                source_row = (
+                    source_name, attribution_data.get('category', 'other'),
+                    attribution_data.get('attribution_window', 30),
+                    attribution_data.get('cost_per_lead', 0.0)
+                )
+                if self._source_names_unique:
+                    cursor.execute(UPSERT_LEAD_SOURCE_SQL, source_row)
+                    source_ids[source_name] = cursor.fetchone()['source_id']
+                    continue
+                source_id = cursor.execute(SELECT_LEAD_SOURCE_ID_SQL, (source_name,)).fetchone()['source_id']
+                if source_id is None:
+                    cursor.execute(INSERT_LEAD_SOURCE_SQL, source_row)
+                    source_id = cursor.lastrowid
+                source_ids[source_name] = source_id
             
-            # Update prospect with lead source
-            cursor.execute("""
-                UPDATE prospects 
-                SET lead_source_id = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE email = ?
-            """, (source_id, prospect_email))
+            # Update prospects with lead source
+            cursor.executemany(UPDATE_PROSPECT_SOURCE_SQL, [
+                (source_ids[source_name], prospect_email) for prospect_email, source_name, _ in rows
+            ])
             
-            self.conn.commit()
-            logger.info(f"Lead source tracked: {prospect_email} -> {source_name}")
+            conn.commit()
+            if len(rows) == 1:
+                logger.info(f"Lead source tracked: {rows[0][0]} -> {rows[0][1]}")
+            else:
+                logger.info(f"Lead sources tracked for {len(rows)} prospects")
             return True
             
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
             logger.error(f"Error tracking lead source: {e}")
             return False
     
@@ -157,35 +640,7 @@ class FunnelAnalyticsEngine:
         try:
             cursor = self.conn.cursor()
             
-            query = """
-                SELECT 
-                    ls.source_name,
-                    ls.source_category,
-                    ls.cost_per_lead,
-                    COUNT(DISTINCT p.prospect_id) as total_leads,
-                    COUNT(DISTINCT dc.call_id) as discovery_calls,
-                    COUNT(DISTINCT pr.proposal_id) as proposals_sent,
-                    COUNT(DISTINCT c.contract_id) as contracts_signed,
-                    COALESCE(SUM(c.contract_value), 0) as total_revenue,
-                    COALESCE(AVG(c.contract_value), 0) as avg_deal_size,
-                    ROUND(
-                        CAST(COUNT(DISTINCT c.contract_id) AS FLOAT) / 
-                        CAST(COUNT(DISTINCT p.prospect_id) AS FLOAT) * 100, 2
-                    ) as conversion_rate,
-                    COALESCE(SUM(c.contract_value), 0) / COUNT(DISTINCT p.prospect_id) as revenue_per_lead,
-                    (ls.cost_per_lead * COUNT(DISTINCT p.prospect_id)) as total_acquisition_cost
-                FROM lead_sources ls
-                LEFT JOIN prospects p ON ls.source_id = p.lead_source_id 
-                    AND p.created_at BETWEEN ? AND ?
-                LEFT JOIN discovery_calls dc ON p.prospect_id = dc.prospect_id
-                LEFT JOIN proposals pr ON p.prospect_id = pr.prospect_id
-                LEFT JOIN contracts c ON p.prospect_id = c.prospect_id
-                WHERE ls.is_active = 1
-                GROUP BY ls.source_id, ls.source_name, ls.source_category, ls.cost_per_lead
-                ORDER BY total_revenue DESC, total_leads DESC
-            """
-            
-            df = pd.read_sql_query(query, self.conn, params=[date_range[0], date_range[1]])
+            df = self._read_frame(LEAD_SOURCE_PERFORMANCE_SQL, list(self._window_bounds(date_range)))
             
             # Calculate additional metrics
             df['roi'] = np.where(df['total_acquisition_cost'] > 0, 
@@ -194,6 +649,8 @@ class FunnelAnalyticsEngine:
             df['payback_period_months'] = np.where(df['revenue_per_lead'] > 0,
                                                  df['cost_per_lead'] / (df['revenue_per_lead'] / 12),
                                                  0)
+            window_revenue = df['total_revenue'].sum()
+            df['revenue_share'] = df['total_revenue'] / window_revenue if window_revenue > 0 else 0.0
             
             logger.info(f"Retrieved lead source performance for {len(df)} sources")
             return df
@@ -222,93 +679,101 @@ class FunnelAnalyticsEngine:
             cursor = self.conn.cursor()
             
             # Base query conditions
-            source_filter = ""
-            params = [date_range[0], date_range[1]]
+            query = CONVERSION_RATES_SQL
+            params = [CallStatus.COMPLETED.value, *self._window_bounds(date_range)]
             if lead_source_id:
-                source_filter = "AND p.lead_source_id = ?"
+                query = CONVERSION_RATES_FOR_SOURCE_SQL
                 params.append(lead_source_id)
             
             # Get funnel metrics
-            query = f"""
-                SELECT 
-                    COUNT(DISTINCT p.prospect_id) as total_leads,
-                    COUNT(DISTINCT CASE WHEN dc.call_id IS NOT NULL THEN p.prospect_id END) as discovery_scheduled,
-                    COUNT(DISTINCT CASE WHEN dc.call_status = 'completed' THEN p.prospect_id END) as discovery_completed,
-                    COUNT(DISTINCT CASE WHEN pr.proposal_id IS NOT NULL THEN p.prospect_id END) as proposals_sent,
-                    COUNT(DISTINCT CASE WHEN c.contract_id IS NOT NULL THEN p.prospect_id END) as contracts_signed,
-                    COALESCE(SUM(c.contract_value), 0) as total_revenue,
-                    COALESCE(AVG(c.contract_value), 0) as avg_deal_size,
-                    AVG(
-                        CASE WHEN c.contract_id IS NOT NULL 
-                        THEN julianday(c.signed_at) - julianday(p.created_at)
-                        ELSE NULL END
-                    ) as avg_sales_cycle_days
-                FROM prospects p
-                LEFT JOIN discovery_calls dc ON p.prospect_id = dc.prospect_id
-                LEFT JOIN proposals pr ON p.prospect_id = pr.prospect_id
-                LEFT JOIN contracts c ON p.prospect_id = c.prospect_id
-                WHERE p.created_at BETWEEN ? AND ? {source_filter}
-            """
-            
             cursor.execute(query, params)
             result = cursor.fetchone()
             
-            # Calculate conversion rates
-            total_leads = result['total_leads'] or 0
-            discovery_scheduled = result['discovery_scheduled'] or 0
-            discovery_completed = result['discovery_completed'] or 0
-            proposals_sent = result['proposals_sent'] or 0
-            contracts_signed = result['contracts_signed'] or 0
-            
-            lead_to_discovery_rate = (discovery_scheduled / total_leads * 100) if total_leads > 0 else 0
-            discovery_to_proposal_rate = (proposals_sent / discovery_completed * 100) if discovery_completed > 0 else 0
-            proposal_to_contract_rate = (contracts_signed / proposals_sent * 100) if proposals_sent > 0 else 0
-            overall_conversion_rate = (contracts_signed / total_leads * 100) if total_leads > 0 else 0
-            
             # Calculate acquisition costs
             if lead_source_id:
-                cursor.execute("SELECT cost_per_lead FROM lead_sources WHERE source_id = ?", (lead_source_id,))
+                cursor.execute(SOURCE_COST_SQL, (lead_source_id,))
                 cost_result = cursor.fetchone()
                 cost_per_lead = cost_result['cost_per_lead'] if cost_result else 0
             else:
                 # Average cost per lead across all sources
-                cursor.execute("""
-                    SELECT AVG(ls.cost_per_lead) as avg_cost
-                    FROM lead_sources ls
-                    JOIN prospects p ON ls.source_id = p.lead_source_id
-                    WHERE p.created_at BETWEEN ? AND ?
-                """, [date_range[0], date_range[1]])
+                cursor.execute(AVERAGE_COST_PER_LEAD_SQL, list(self._window_bounds(date_range)))
                 cost_result = cursor.fetchone()
                 cost_per_lead = cost_result['avg_cost'] if cost_result and cost_result['avg_cost'] else 0
             
-            cost_per_acquisition = (cost_per_lead * total_leads / contracts_signed) if contracts_signed > 0 else 0
+            metrics = self._build_metrics([result], [cost_per_lead], self._window_days(date_range))[0]
             
-            # Calculate lifetime value (simplified)
-            lifetime_value = result['avg_deal_size'] or 0
-            
-            metrics = ConversionMetrics(
-                total_leads=total_leads,
-                discovery_calls_scheduled=discovery_scheduled,
-                discovery_calls_completed=discovery_completed,
-                proposals_sent=proposals_sent,
-                contracts_signed=contracts_signed,
-                total_revenue=result['total_revenue'] or 0,
-                avg_deal_size=result['avg_deal_size'] or 0,
-                avg_sales_cycle_days=result['avg_sales_cycle_days'] or 0,
-                lead_to_discovery_rate=lead_to_discovery_rate,
-                discovery_to_proposal_rate=discovery_to_proposal_rate,
-                proposal_to_contract_rate=proposal_to_contract_rate,
-                overall_conversion_rate=overall_conversion_rate,
-                cost_per_acquisition=cost_per_acquisition,
-                lifetime_value=lifetime_value
-            )
-            
-            logger.info(f"Calculated conversion metrics for {total_leads} leads")
+            logger.info(f"Calculated conversion metrics for {metrics.total_leads} leads")
             return metrics
             
         except Exception as e:
             logger.error(f"Error calculating conversion rates: {e}")
-            return ConversionMetrics(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            return EMPTY_METRICS
+    
+    def calculate_conversion_rates_by_source(self, date_range: Tuple[date, date]) -> Dict[int, ConversionMetrics]:
+        """
+        Calculate conversion rates for every lead source with leads in the window, in one query
+        
+        Args:
+            date_range: Tuple of (start_date, end_date)
+            
+        Returns:
+            Dictionary of lead source ID to ConversionMetrics
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(CONVERSION_RATES_PER_SOURCE_SQL,
+                           [CallStatus.COMPLETED.value, *self._window_bounds(date_range)])
+            results = cursor.fetchall()
+            
+            metrics = self._build_metrics(results, [r['cost_per_lead'] or 0 for r in results],
+                                          self._window_days(date_range))
+            
+            logger.info(f"Calculated conversion metrics for {len(metrics)} lead sources")
+            return {r['source_id']: m for r, m in zip(results, metrics)}
+            
+        except Exception as e:
+            logger.error(f"Error calculating conversion rates by source: {e}")
+            return {}
+    
+    def _build_metrics(self, results: List[sqlite3.Row], cost_per_lead: List[float],
+                       period_days: int) -> List[ConversionMetrics]:
+        """Turn funnel total rows into ConversionMetrics, deriving every ratio in one vectorized pass"""
+        def column(name: str) -> np.ndarray:
+            return np.fromiter((r[name] or 0 for r in results), dtype=np.float64, count=len(results))
+        
+        totals = {name: column(name) for name in (
+            'total_leads', 'discovery_scheduled', 'discovery_completed', 'proposals_sent',
+            'contracts_signed', 'total_revenue', 'contract_total', 'signed_total',
+            'cycle_days_total'
+        )}
+        rates = _compute_rates(cost_per_lead=np.asarray(cost_per_lead, dtype=np.float64), **totals)
+        
+        metrics = []
+        for i, result in enumerate(results):
+            avg_deal_size = float(rates['avg_deal_size'][i])
+            total_leads = result['total_leads'] or 0
+            total_revenue = result['total_revenue'] or 0
+            metrics.append(ConversionMetrics(
+                total_leads=total_leads,
+                discovery_calls_scheduled=result['discovery_scheduled'] or 0,
+                discovery_calls_completed=result['discovery_completed'] or 0,
+                proposals_sent=result['proposals_sent'] or 0,
+                contracts_signed=result['contracts_signed'] or 0,
+                total_revenue=total_revenue,
+                avg_deal_size=avg_deal_size,
+                avg_sales_cycle_days=float(rates['avg_sales_cycle_days'][i]),
+                lead_to_discovery_rate=float(rates['lead_to_discovery_rate'][i]),
+                discovery_to_proposal_rate=float(rates['discovery_to_proposal_rate'][i]),
+                proposal_to_contract_rate=float(rates['proposal_to_contract_rate'][i]),
+                overall_conversion_rate=float(rates['overall_conversion_rate'][i]),
+                cost_per_acquisition=float(rates['cost_per_acquisition'][i]),
+                # Calculate lifetime value (simplified)
+                lifetime_value=avg_deal_size,
+                daily_leads=total_leads / period_days if period_days > 0 else 0.0,
+                daily_revenue=total_revenue / period_days if period_days > 0 else 0.0
+            ))
+        
+        return metrics
     
     # ================================
     # BOTTLENECK IDENTIFICATION
@@ -327,70 +792,14 @@ class FunnelAnalyticsEngine:
         try:
             cursor = self.conn.cursor()
             
-            # Get stage performance data
-            query = """
-                SELECT 
-                    fs.stage_name,
-                    fs.stage_order,
-                    fs.expected_duration_days,
-                    COUNT(DISTINCT pj.prospect_id) as prospects_entered,
-                    COUNT(DISTINCT CASE WHEN pj.exited_at IS NOT NULL THEN pj.prospect_id END) as prospects_exited,
-                    AVG(
-                        CASE WHEN pj.exited_at IS NOT NULL 
-                        THEN (julianday(pj.exited_at) - julianday(pj.entered_at))
-                        ELSE (julianday('now') - julianday(pj.entered_at))
-                        END
-                    ) as avg_duration_days,
-                    COUNT(DISTINCT CASE WHEN pj.exited_at IS NULL AND julianday('now') - julianday(pj.entered_at) > fs.expected_duration_days THEN pj.prospect_id END) as prospects_stuck
-                FROM funnel_stages fs
-                LEFT JOIN prospect_journey pj ON fs.stage_id = pj.stage_id
-                    AND pj.entered_at BETWEEN ? AND ?
-                WHERE fs.stage_name != 'Lost/Disqualified'
-                GROUP BY fs.stage_id, fs.stage_name, fs.stage_order, fs.expected_duration_days
-                ORDER BY fs.stage_order
-            """
-            
-            cursor.execute(query, [date_range[0], date_range[1]])
-            results = cursor.fetchall()
+            now_julian = time.time() / 86400.0 + UNIX_EPOCH_JULIAN_DAY
+            cursor.execute(STAGE_PERFORMANCE_SQL, [now_julian, *self._window_bounds(date_range)])
             
+            # Stream stage rows in batches rather than materializing the whole result
+            cursor.arraysize = BOTTLENECK_FETCH_SIZE
             bottlenecks = []
-            
-            for result in results:
-                prospects_entered = result['prospects_entered'] or 0
-                prospects_exited = result['prospects_exited'] or 0
-                avg_duration = result['avg_duration_days'] or 0
-                expected_duration = result['expected_duration_days']
-                prospects_stuck = result['prospects_stuck'] or 0
-                
-                # Calculate conversion rate
-                conversion_rate = (prospects_exited / prospects_entered * 100) if prospects_entered > 0 else 0
-                
-                # Determine bottleneck severity
-                duration_factor = avg_duration / expected_duration if expected_duration > 0 else 1
-                stuck_factor = prospects_stuck / prospects_entered if prospects_entered > 0 else 0
-                
-                if conversion_rate < 50 or duration_factor > 2 or stuck_factor > 0.3:
-                    severity = "HIGH"
-                elif conversion_rate < 70 or duration_factor > 1.5 or stuck_factor > 0.2:
-                    severity = "MEDIUM"
-                else:
-                    severity = "LOW"
-                
-                # Generate recommendations
-                recommendations = self._generate_bottleneck_recommendations(
-                    result['stage_name'], conversion_rate, duration_factor, stuck_factor
-                )
-                
-                bottleneck = BottleneckAnalysis(
-                    stage_name=result['stage_name'],
-                    conversion_rate=conversion_rate,
-                    avg_duration_days=avg_duration,
-                    prospects_stuck=prospects_stuck,
-                    bottleneck_severity=severity,
-                    recommendations=recommendations
-                )
-                
-                bottlenecks.append(bottleneck)
+            for batch in iter(cursor.fetchmany, []):
+                bottlenecks.extend(self._analyze_stage_batch(batch))
             
             logger.info(f"Identified {len([b for b in bottlenecks if b.bottleneck_severity == 'HIGH'])} high-priority bottlenecks")
             return bottlenecks
@@ -399,62 +808,59 @@ class FunnelAnalyticsEngine:
             logger.error(f"Error identifying bottlenecks: {e}")
             return []
     
-    def _generate_bottleneck_recommendations(self, stage_name: str, conversion_rate: float,
-                                           duration_factor: float, stuck_factor: float) -> List[str]:
-        """Generate specific recommendations for bottleneck stages"""
-        recommendations = []
+    def _analyze_stage_batch(self, results: List[sqlite3.Row]) -> List[BottleneckAnalysis]:
+        """Score a batch of stage rows and build their bottleneck analyses"""
+        stage_count = len(results)
+        entered = np.fromiter((r['prospects_entered'] or 0 for r in results), dtype=np.float64, count=stage_count)
+        exited = np.fromiter((r['prospects_exited'] or 0 for r in results), dtype=np.float64, count=stage_count)
+        avg_duration = np.fromiter((r['avg_duration_days'] or 0 for r in results), dtype=np.float64, count=stage_count)
+        expected_duration = np.fromiter((r['expected_duration_days'] for r in results), dtype=np.float64, count=stage_count)
+        stuck = np.fromiter((r['prospects_stuck'] or 0 for r in results), dtype=np.float64, count=stage_count)
         
-        stage_recommendations = {
-            "Lead Generated": [
-                "Implement lead scoring to prioritize high-quality prospects",
-                "Create automated qualification sequences",
-                "Review lead source quality and adjust targeting"
-            ],
-            "Discovery Call Scheduled": [
-                "Improve initial outreach messaging and value proposition",
-                "Implement calendar booking automation",
-                "Create urgency with limited-time offers or consultations"
-            ],
-            "Discovery Call Completed": [
-                "Reduce no-show rates with confirmation sequences",
-                "Train sales team on discovery call best practices",
-                "Implement call recording and analysis for improvement"
-            ],
-            "Proposal Sent": [
-                "Streamline discovery-to-proposal process",
-                "Create proposal templates for faster turnaround",
-                "Implement better qualification to ensure proposal-ready prospects"
-            ],
-            "Proposal Under Review": [
-                "Create structured follow-up sequences",
-                "Implement proposal tracking and engagement analytics",
-                "Add social proof and case studies to proposals"
-            ],
-            "Contract Negotiation": [
-                "Streamline contract terms and reduce complexity",
-                "Train team on objection handling and negotiation",
-                "Create flexible pricing options and packages"
-            ]
-        }
+        # Calculate conversion rate
+        has_entries = entered > 0
+        conversion_rates = np.divide(exited * 100, entered, out=np.zeros(stage_count), where=has_entries)
         
-        # Add stage-specific recommendations
-        if stage_name in stage_recommendations:
-            recommendations.extend(stage_recommendations[stage_name])
+        # Determine bottleneck severity
+        duration_factors = np.divide(avg_duration, expected_duration, out=np.ones(stage_count),
+                                     where=expected_duration > 0)
+        stuck_factors = np.divide(stuck, entered, out=np.zeros(stage_count), where=has_entries)
         
-        # Add performance-specific recommendations
-        if conversion_rate < 50:
-            recommendations.append("URGENT: Review and improve qualification criteria")
-            recommendations.append("Analyze lost prospects for common patterns")
+        severities = np.select(
+            [
+                (conversion_rates < 50) | (duration_factors > 2) | (stuck_factors > 0.3),
+                (conversion_rates < 70) | (duration_factors > 1.5) | (stuck_factors > 0.2),
+            ],
+            ["HIGH", "MEDIUM"],
+            default="LOW"
+        )
+        flags = _bottleneck_flags(conversion_rates, duration_factors, stuck_factors)
         
-        if duration_factor > 2:
-            recommendations.append("Implement automated follow-up sequences")
-            recommendations.append("Set clear timelines and next steps with prospects")
+        bottlenecks = []
         
-        if stuck_factor > 0.3:
-            recommendations.append("Create re-engagement campaigns for stalled prospects")
-            recommendations.append("Implement stage-specific nurturing content")
+        for i, result in enumerate(results):
+            # Generate recommendations
+            recommendations = list(_bottleneck_recommendations(result['stage_name'], int(flags[i])))
+            
+            bottleneck = BottleneckAnalysis(
+                stage_name=result['stage_name'],
+                conversion_rate=float(conversion_rates[i]),
+                avg_duration_days=float(avg_duration[i]),
+                prospects_stuck=result['prospects_stuck'] or 0,
+                bottleneck_severity=str(severities[i]),
+                recommendations=recommendations
+            )
+            
+            bottlenecks.append(bottleneck)
         
-        return recommendations[:5]  # Limit to top 5 recommendations
+        return bottlenecks
+    
+    def _generate_bottleneck_recommendations(self, stage_name: str, conversion_rate: float,
+                                           duration_factor: float, stuck_factor: float) -> List[str]:
+        """Generate specific recommendations for bottleneck stages"""
+        flags = _bottleneck_flags(np.array([conversion_rate]), np.array([duration_factor]),
+                                  np.array([stuck_factor]))
+        return list(_bottleneck_recommendations(stage_name, int(flags[0])))
     
     # ================================
     # REVENUE ATTRIBUTION
@@ -475,56 +881,12 @@ class FunnelAnalyticsEngine:
         try:
             cursor = self.conn.cursor()
             
-            # Get contracts with lead source attribution
-            query = """
-                SELECT 
-                    ls.source_name,
-                    ls.source_category,
-                    c.contract_id,
-                    c.contract_value,
-                    c.monthly_recurring_revenue,
-                    c.signed_at,
-                    p.created_at as lead_created_at,
-                    julianday(c.signed_at) - julianday(p.created_at) as sales_cycle_days
-                FROM contracts c
-                JOIN prospects p ON c.prospect_id = p.prospect_id
-                JOIN lead_sources ls ON p.lead_source_id = ls.source_id
-                WHERE c.signed_at BETWEEN ? AND ?
-                    AND c.contract_status = 'active'
-                ORDER BY ls.source_name, c.signed_at
-            """
-            
-            df = pd.read_sql_query(query, self.conn, params=[date_range[0], date_range[1]])
-            
-            if df.empty:
+            attribution_df = self._read_frame(REVENUE_ATTRIBUTION_SQL, [*self._window_bounds(date_range), ContractStatus.ACTIVE.value])
+            
+            if attribution_df.empty:
                 return pd.DataFrame()
             
-            # Group by lead source and calculate attribution
-            attribution_df = df.groupby(['source_name', 'source_category']).agg({
-                'contract_value': ['sum', 'mean', 'count'],
-                'monthly_recurring_revenue': 'sum',
-                'sales_cycle_days': 'mean'
-            }).round(2)
-            
-            # Flatten column names
-            attribution_df.columns = ['_'.join(col).strip() if col[1] else col[0] for col in attribution_df.columns.values]
-            attribution_df = attribution_df.reset_index()
-            
-            # Rename columns for clarity
-            attribution_df = attribution_df.rename(columns={
-                'contract_value_sum': 'total_attributed_revenue',
-                'contract_value_mean': 'avg_deal_size',
-                'contract_value_count': 'total_contracts',
-                'monthly_recurring_revenue_sum': 'total_mrr',
-                'sales_cycle_days_mean': 'avg_sales_cycle_days'
-            })
-            
-            # Calculate percentage of total revenue
-            total_revenue = attribution_df['total_attributed_revenue'].sum()
-            attribution_df['revenue_percentage'] = (attribution_df['total_attributed_revenue'] / total_revenue * 100).round(2)
-            
-            # Sort by revenue contribution
-            attribution_df = attribution_df.sort_values('total_attributed_revenue', ascending=False)
+            attribution_df = attribution_df.round(2)
             
             logger.info(f"Calculated revenue attribution for {len(attribution_df)} lead sources")
             return attribution_df
@@ -537,6 +899,56 @@ class FunnelAnalyticsEngine:
     # COMPREHENSIVE INSIGHTS
     # ================================
     
+    @contextmanager
+    def _read_snapshot(self):
+        """Hold one read transaction so every query inside sees the same database snapshot"""
+        conn = self.conn
+        owns_transaction = not conn.in_transaction
+        if owns_transaction:
+            conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            if owns_transaction:
+                conn.commit()
+    
+    def aggregate_window(self, date_range: Tuple[date, date]) -> Tuple[ConversionMetrics, pd.DataFrame,
+                                                                       List[BottleneckAnalysis], pd.DataFrame]:
+        """
+        Run the four window aggregations behind the comprehensive insights in one read snapshot
+        
+        Args:
+            date_range: Tuple of (start_date, end_date)
+            
+        Returns:
+            Tuple of (metrics, source performance, bottlenecks, revenue attribution)
+        """
+        with self._read_snapshot():
+            metrics = self.calculate_conversion_rates(date_range)
+            source_performance = self.get_lead_source_performance(date_range)
+            bottlenecks = self.identify_bottlenecks(date_range)
+            revenue_attribution = self.calculate_revenue_attribution(date_range)
+        
+        return metrics, source_performance, bottlenecks, revenue_attribution
+    
+    def overview_bundle(self, date_range: Tuple[date, date]) -> Tuple[ConversionMetrics, pd.DataFrame, List[BottleneckAnalysis]]:
+        """
+        Conversion metrics, lead source performance and bottlenecks for one date range,
+        read inside a single transaction so all three see the same database snapshot
+        
+        Args:
+            date_range: Tuple of start and end dates
+            
+        Returns:
+            Tuple of (metrics, source performance, bottlenecks)
+        """
+        with self._read_snapshot():
+            metrics = self.calculate_conversion_rates(date_range)
+            source_performance = self.get_lead_source_performance(date_range)
+            bottlenecks = self.identify_bottlenecks(date_range)
+        
+        return metrics, source_performance, bottlenecks
+    
     def generate_comprehensive_insights(self, date_range: Tuple[date, date]) -> Dict[str, Any]:
         """
         Generate comprehensive funnel insights and recommendations
@@ -547,6 +959,29 @@ class FunnelAnalyticsEngine:
         Returns:
             Dictionary with comprehensive insights
         """
+        version = self.data_version()
+        cache_key = (date_range[0], date_range[1], version)
+        if version is not None:
+            with self._insights_lock:
+                cached = self._insights_cache.get(cache_key)
+            if cached is not None:
+                # Callers get their own copy, stamped with when it was served
+                insights = copy.deepcopy(cached)
+                insights["generated_at"] = datetime.now().isoformat()
+                return insights
+        
+        insights = self._build_comprehensive_insights(date_range)
+        
+        if insights and version is not None:
+            with self._insights_lock:
+                if len(self._insights_cache) >= INSIGHTS_CACHE_SIZE:
+                    self._insights_cache.pop(next(iter(self._insights_cache)))
+                self._insights_cache[cache_key] = copy.deepcopy(insights)
+        
+        return insights
+    
+    def _build_comprehensive_insights(self, date_range: Tuple[date, date]) -> Dict[str, Any]:
+        """Run every analysis for the date range and assemble the insights dictionary"""
         try:
             insights = {
                 "period": {"start": date_range[0].isoformat(), "end": date_range[1].isoformat()},
@@ -559,8 +994,9 @@ class FunnelAnalyticsEngine:
                 "key_recommendations": []
             }
             
+            overall_metrics, source_performance, bottlenecks, revenue_attribution = self.aggregate_window(date_range)
+            
             # Get overall conversion metrics
-            overall_metrics = self.calculate_conversion_rates(date_range)
             insights["conversion_metrics"] = {
                 "total_leads": overall_metrics.total_leads,
                 "contracts_signed": overall_metrics.contracts_signed,
@@ -576,16 +1012,14 @@ class FunnelAnalyticsEngine:
             }
             
             # Get lead source performance
-            source_performance = self.get_lead_source_performance(date_range)
             if not source_performance.empty:
                 insights["lead_source_performance"] = {
-                    "top_sources_by_revenue": source_performance.head(5)[['source_name', 'total_revenue', 'conversion_rate']].to_dict('records'),
-                    "top_sources_by_volume": source_performance.nlargest(5, 'total_leads')[['source_name', 'total_leads', 'conversion_rate']].to_dict('records'),
-                    "most_efficient_sources": source_performance.nlargest(5, 'roi')[['source_name', 'roi', 'revenue_per_lead']].to_dict('records')
+                    "top_sources_by_revenue": _to_records(source_performance.head(5), ['source_name', 'total_revenue', 'conversion_rate']),
+                    "top_sources_by_volume": _to_records(source_performance.nlargest(5, 'total_leads'), ['source_name', 'total_leads', 'conversion_rate']),
+                    "most_efficient_sources": _to_records(source_performance.nlargest(5, 'roi'), ['source_name', 'roi', 'revenue_per_lead'])
                 }
             
             # Get bottleneck analysis
-            bottlenecks = self.identify_bottlenecks(date_range)
             high_priority_bottlenecks = [b for b in bottlenecks if b.bottleneck_severity == "HIGH"]
             insights["bottleneck_analysis"] = {
                 "high_priority_count": len(high_priority_bottlenecks),
@@ -594,10 +1028,9 @@ class FunnelAnalyticsEngine:
             }
             
             # Get revenue attribution
-            revenue_attribution = self.calculate_revenue_attribution(date_range)
             if not revenue_attribution.empty:
                 insights["revenue_attribution"] = {
-                    "top_revenue_sources": revenue_attribution.head(3)[['source_name', 'total_attributed_revenue', 'revenue_percentage']].to_dict('records'),
+                    "top_revenue_sources": _to_records(revenue_attribution.head(3), ['source_name', 'total_attributed_revenue', 'revenue_percentage']),
                     "revenue_concentration": revenue_attribution.head(3)['revenue_percentage'].sum()
                 }
             
@@ -606,7 +1039,7 @@ class FunnelAnalyticsEngine:
                 "total_pipeline_value": overall_metrics.total_revenue,
                 "conversion_health": "Good" if overall_metrics.overall_conversion_rate > 10 else "Needs Improvement",
                 "primary_bottleneck": high_priority_bottlenecks[0].stage_name if high_priority_bottlenecks else "None identified",
-                "top_performing_source": source_performance.iloc[0]['source_name'] if not source_performance.empty else "No data",
+                "top_performing_source": source_performance['source_name'].iat[0] if not source_performance.empty else "No data",
                 "key_metric_trends": self._analyze_trends(date_range)
             }
             
@@ -636,31 +1069,32 @@ class FunnelAnalyticsEngine:
                                          bottlenecks: List[BottleneckAnalysis],
                                          source_performance: pd.DataFrame) -> List[str]:
         """Generate strategic recommendations based on analysis"""
-        recommendations = []
-        
-        # Conversion rate recommendations
-        if metrics.overall_conversion_rate < 5:
-            recommendations.append("CRITICAL: Overall conversion rate is below 5%. Focus on lead qualification and sales process optimization.")
-        elif metrics.overall_conversion_rate < 10:
-            recommendations.append("Conversion rate needs improvement. Consider implementing lead scoring and nurturing sequences.")
+        conversion_rate = metrics.overall_conversion_rate
         
-        # Lead source recommendations
+        # Lead source conditions
+        high_roi_source = False
+        low_count = 0
         if not source_performance.empty:
-            top_source = source_performance.iloc[0]
-            if top_source['roi'] > 200:
-                recommendations.append(f"Scale investment in {top_source['source_name']} - showing excellent ROI of {top_source['roi']:.0f}%")
+            source_flags = _classify_sources(source_performance['roi'].to_numpy(dtype=np.float64),
+                                             source_performance['conversion_rate'].to_numpy(dtype=np.float64))
             
-            low_performing = source_performance[source_performance['conversion_rate'] < 2]
-            if not low_performing.empty:
-                recommendations.append(f"Consider pausing or optimizing {len(low_performing)} underperforming lead sources")
+            top_source = next(source_performance[['source_name', 'roi']].itertuples(index=False))
+            high_roi_source = bool(source_flags[0] & SOURCE_FLAG_HIGH_ROI)
+            source_name = top_source.source_name
+            roi_val = float(top_source.roi)
+            
+            low_count = int(np.count_nonzero(source_flags & SOURCE_FLAG_LOW_CONVERSION))
         
-        # Bottleneck recommendations
+        # Bottleneck conditions
+        bottleneck_key = None
         if bottlenecks:
             primary_bottleneck = bottlenecks[0]
-            recommendations.append(f"Address {primary_bottleneck.stage_name} bottleneck - {primary_bottleneck.recommendations[0] if primary_bottleneck.recommendations else 'needs immediate attention'}")
-        
-        # Sales cycle recommendations
-        if metrics.avg_sales_cycle_days > 60:
-            recommendations.append("Sales cycle is lengthy. Implement urgency tactics and streamline decision-making process.")
+            primary_rec = primary_bottleneck.recommendations[0] if primary_bottleneck.recommendations else 'needs immediate attention'
+            bottleneck_key = (primary_bottleneck.stage_name, primary_rec)
         
-        return recommendations[:5]  # Return top 5 recommendations
\ No newline at end of file
+        # Only the values that show up in the text go into the cache key
+        top_source_key = (source_name, round(roi_val)) if high_roi_source else None
+        return list(_format_strategic_recommendations(
+            conversion_rate < 5, 5 <= conversion_rate < 10, top_source_key, low_count,
+            bottleneck_key, metrics.avg_sales_cycle_days > 60
+        ))
\ No newline at end of file
@@ -6,28 +6,102 @@ Advanced analytics and AI-powered recommendations for funnel optimization
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple, NamedTuple
 import json
 import logging
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, fields
 from funnel_analytics_engine import FunnelAnalyticsEngine, ConversionMetrics, BottleneckAnalysis
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Date ranges whose engine results are kept in memory between insight runs
+SNAPSHOT_CACHE_SIZE = 32
+
+# (display name, ConversionMetrics field / industry_benchmarks key) for each benchmarked metric
+BENCHMARK_METRICS = (
+    ("Overall Conversion Rate", "overall_conversion_rate"),
+    ("Lead to Discovery Rate", "lead_to_discovery_rate"),
+    ("Discovery to Proposal Rate", "discovery_to_proposal_rate"),
+    ("Proposal to Contract Rate", "proposal_to_contract_rate"),
+    ("Average Sales Cycle", "avg_sales_cycle_days"),
+    ("Average Deal Size", "avg_deal_size")
+)
+BENCHMARK_LOWER_IS_BETTER = np.array([False, False, False, False, True, False])
+
+# Performance ratio cut points; tier i covers [thresholds[i-1], thresholds[i])
+BENCHMARK_RATIO_THRESHOLDS = np.array([0.7, 0.9, 1.2, 1.5])
+BENCHMARK_PERCENTILES = np.array([10, 30, 60, 80, 95])
+BENCHMARK_STATUSES = np.array(["POOR", "BELOW_AVERAGE", "AVERAGE", "GOOD", "EXCELLENT"])
+
+# Assumed lead growth over the 90-day forecast horizon
+FORECAST_GROWTH_MULTIPLIER = 1.1
+
+# ROI efficiency tiers, lowest first, as cut by efficiency_thresholds
+ROI_BUCKET_LABELS = ("Poor", "Acceptable", "Good", "Excellent")
+
+# Recommended focus for the first HIGH priority insight type found, in precedence order
+_FOCUS_ORDER = (
+    ("CONVERSION_OPTIMIZATION", "Conversion Rate Optimization"),
+    ("PROCESS_OPTIMIZATION", "Bottleneck Elimination"),
+    ("INVESTMENT_SCALING", "High-ROI Source Scaling"),
+    ("COST_OPTIMIZATION", "Cost Efficiency Improvement")
+)
+
+# Opportunity score floors (exclusive), highest first; anything lower is "Low"
+_OPPORTUNITY_TIERS = (
+    (80, "Very High (50%+ revenue increase potential)"),
+    (50, "High (25-50% revenue increase potential)"),
+    (25, "Medium (10-25% revenue increase potential)")
+)
+
+class FunnelSnapshot(NamedTuple):
+    """Engine results for one date range, shared by every insight helper"""
+    metrics: ConversionMetrics
+    source_performance: pd.DataFrame
+    bottlenecks: List[BottleneckAnalysis]
+    revenue_attribution: pd.DataFrame
+    source_columns: Dict[str, np.ndarray]
+
+# Lead source performance columns the insight helpers read row-by-row
+SOURCE_COLUMNS = ('source_name', 'roi', 'revenue_per_lead', 'cost_per_lead',
+                  'total_revenue', 'total_acquisition_cost', 'revenue_share')
+
+def _source_columns(source_performance: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Read-only typed arrays of the source columns, extracted once per snapshot"""
+    columns = {}
+    for column in SOURCE_COLUMNS:
+        dtype = object if column == 'source_name' else np.float64
+        if source_performance.empty:
+            values = np.empty(0, dtype=dtype)
+        else:
+            values = source_performance[column].to_numpy(dtype=dtype)
+        values.flags.writeable = False
+        columns[column] = values
+    return columns
+
+# Action text template and its positional format arguments; () means the text is used verbatim
+ActionTemplate = Tuple[str, Tuple[Any, ...]]
+
+def _render_action(action: ActionTemplate) -> str:
+    """Format a deferred recommended action"""
+    template, args = action
+    return template.format(*args) if args else template
+
+@dataclass(slots=True, frozen=True)
 class StrategicInsight:
     insight_type: str
     priority: str  # HIGH, MEDIUM, LOW
     title: str
     description: str
     impact_estimate: str
-    recommended_actions: List[str]
+    recommended_actions: List[ActionTemplate]  # formatted by _render_action when serialized
     success_metrics: List[str]
     confidence_score: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BenchmarkComparison:
     metric_name: str
     your_value: float
@@ -35,11 +109,88 @@ class BenchmarkComparison:
     percentile_rank: int
     performance_status: str  # EXCELLENT, GOOD, AVERAGE, BELOW_AVERAGE, POOR
 
+# Field names for serializing the slotted dataclasses, which have no __dict__
+_INSIGHT_FIELDS = tuple(f.name for f in fields(StrategicInsight))
+_BENCHMARK_FIELDS = tuple(f.name for f in fields(BenchmarkComparison))
+
+def _insight_as_dict(insight: StrategicInsight) -> Dict[str, Any]:
+    """Serialize an insight, formatting its recommended actions"""
+    record = {name: getattr(insight, name) for name in _INSIGHT_FIELDS}
+    record["recommended_actions"] = [_render_action(action) for action in insight.recommended_actions]
+    return record
+
+class InsightPriorities(NamedTuple):
+    """Strategic insights split by priority, in their original order"""
+    high: List[StrategicInsight]
+    medium: List[StrategicInsight]
+    high_types: Set[str]
+
+def _group_by_priority(insights: List[StrategicInsight]) -> InsightPriorities:
+    """Split insights into HIGH and MEDIUM priority lists in a single pass"""
+    high, medium, high_types = [], [], set()
+    for insight in insights:
+        if insight.priority == "HIGH":
+            high.append(insight)
+            high_types.add(insight.insight_type)
+        elif insight.priority == "MEDIUM":
+            medium.append(insight)
+    return InsightPriorities(high, medium, high_types)
+
+class BottlenecksBySeverity(NamedTuple):
+    """HIGH and MEDIUM severity bottlenecks, in the engine's stage order"""
+    high: List[BottleneckAnalysis]
+    medium: List[BottleneckAnalysis]
+
+def _group_by_severity(bottlenecks: List[BottleneckAnalysis]) -> BottlenecksBySeverity:
+    """Split bottlenecks by severity in a single pass, leaving the shared snapshot list untouched"""
+    high, medium = [], []
+    for bottleneck in bottlenecks:
+        if bottleneck.bottleneck_severity == "HIGH":
+            high.append(bottleneck)
+        elif bottleneck.bottleneck_severity == "MEDIUM":
+            medium.append(bottleneck)
+    return BottlenecksBySeverity(high, medium)
+
+class Forecast(NamedTuple):
+    """Projected volumes and revenue for the 30/90-day horizons and 90-day scenarios"""
+    leads_30: int
+    contracts_30: int
+    revenue_30: float
+    leads_90: int
+    contracts_90: int
+    revenue_90: float
+    revenue_conservative: float
+    revenue_optimistic: float
+    revenue_aggressive: float
+
+def _forecast_kernel(daily_leads: float, daily_revenue: float,
+                     conversion_rate: float, growth_multiplier: float) -> Forecast:
+    """Project the period's daily run rate forward, computing each shared product once"""
+    contract_rate = conversion_rate / 100
+    
+    leads_30 = daily_leads * 30
+    leads_90 = daily_leads * 90 * growth_multiplier
+    revenue_90 = daily_revenue * 90
+    
+    return Forecast(
+        leads_30=int(leads_30),
+        contracts_30=int(leads_30 * contract_rate),
+        revenue_30=daily_revenue * 30,
+        leads_90=int(leads_90),
+        contracts_90=int(leads_90 * contract_rate),
+        revenue_90=revenue_90 * growth_multiplier,
+        revenue_conservative=revenue_90,
+        revenue_optimistic=revenue_90 * 1.2,
+        revenue_aggressive=revenue_90 * 1.5 * 1.2
+    )
+
 class FunnelInsightsGenerator:
     """Advanced analytics and insights generation for funnel optimization"""
     
     def __init__(self, analytics_engine: FunnelAnalyticsEngine):
         self.analytics_engine = analytics_engine
+        self._snapshot_cache: Dict[Tuple[date, date], Tuple[Any, FunnelSnapshot]] = {}
+        self._snapshot_lock = threading.Lock()
         
         # Industry benchmarks (can be updated with real data)
         self.industry_benchmarks = {
@@ -67,85 +218,154 @@ class FunnelInsightsGenerator:
             date_range: Analysis period
             
         Returns:
-            Dictionary with comprehensive insights and recommendations
+            Dictionary with comprehensive insights and recommendations; the analysis
+            period holds date/datetime objects, so serialize it with orjson (or the
+            dashboard's JSON provider), which emits them as ISO 8601 strings
         """
+        generated_at = datetime.now()
+        if date_range[1] < date_range[0]:
+            # An inverted range selects no rows, so skip the engine round-trips entirely
+            logger.warning("Insights requested for inverted range %s to %s", date_range[0], date_range[1])
+            return self._empty_envelope(date_range, generated_at)
+        
         try:
-            logger.info(f"Generating comprehensive insights for {date_range[0]} to {date_range[1]}")
+            logger.info("Generating comprehensive insights for %s to %s", date_range[0], date_range[1])
             
             # Get baseline metrics
-            overall_metrics = self.analytics_engine.calculate_conversion_rates(date_range)
-            source_performance = self.analytics_engine.get_lead_source_performance(date_range)
-            bottlenecks = self.analytics_engine.identify_bottlenecks(date_range)
-            revenue_attribution = self.analytics_engine.calculate_revenue_attribution(date_range)
+            (overall_metrics, source_performance, bottlenecks,
+             revenue_attribution, sources) = self._load_snapshot(date_range)
+            severities = _group_by_severity(bottlenecks)
             
             # Generate strategic insights
             strategic_insights = self._generate_strategic_insights(
-                overall_metrics, source_performance, bottlenecks, revenue_attribution
+                overall_metrics, sources, severities.high, revenue_attribution
             )
             
+            priorities = _group_by_priority(strategic_insights)
+            
             # Benchmark comparison
             benchmark_comparison = self._compare_to_benchmarks(overall_metrics)
             
             # Opportunity analysis
             opportunities = self._identify_growth_opportunities(
-                overall_metrics, source_performance, bottlenecks
+                overall_metrics, sources, severities.medium
             )
             
             # Risk analysis
-            risks = self._identify_risks(overall_metrics, source_performance, bottlenecks)
+            risks = self._identify_risks(overall_metrics, sources, severities.high)
             
             # ROI optimization recommendations
             roi_optimization = self._generate_roi_optimization_plan(source_performance)
             
             # Predictive insights
-            predictions = self._generate_predictive_insights(date_range, overall_metrics)
+            predictions = self._generate_predictive_insights(overall_metrics)
             
             comprehensive_insights = {
                 "analysis_period": {
-                    "start_date": date_range[0].isoformat(),
-                    "end_date": date_range[1].isoformat(),
-                    "generated_at": datetime.now().isoformat()
+                    "start_date": date_range[0],
+                    "end_date": date_range[1],
+                    "generated_at": generated_at
                 },
                 "executive_summary": self._generate_executive_summary(
-                    overall_metrics, strategic_insights, benchmark_comparison
+                    overall_metrics, priorities, benchmark_comparison
                 ),
-                "strategic_insights": [insight.__dict__ for insight in strategic_insights],
-                "benchmark_comparison": [comp.__dict__ for comp in benchmark_comparison],
+                "strategic_insights": [_insight_as_dict(insight) for insight in strategic_insights],
+                "benchmark_comparison": [
+                    {name: getattr(comp, name) for name in _BENCHMARK_FIELDS} for comp in benchmark_comparison
+                ],
                 "growth_opportunities": opportunities,
                 "risk_analysis": risks,
                 "roi_optimization": roi_optimization,
                 "predictive_insights": predictions,
-                "action_plan": self._create_30_60_90_action_plan(strategic_insights),
+                "action_plan": self._create_30_60_90_action_plan(priorities.high, priorities.medium),
                 "success_metrics": self._define_success_metrics(overall_metrics)
             }
             
-            logger.info(f"Generated {len(strategic_insights)} strategic insights")
+            logger.info("Generated %d strategic insights", len(strategic_insights))
             return comprehensive_insights
             
         except Exception as e:
             logger.error(f"Error generating comprehensive insights: {e}")
             return {}
     
+    def _empty_envelope(self, date_range: Tuple[date, date], generated_at: datetime) -> Dict[str, Any]:
+        """Insights skeleton for a date range that cannot contain any data"""
+        return {
+            "analysis_period": {
+                "start_date": date_range[0],
+                "end_date": date_range[1],
+                "generated_at": generated_at
+            },
+            "executive_summary": {},
+            "strategic_insights": [],
+            "benchmark_comparison": [],
+            "growth_opportunities": [],
+            "risk_analysis": [],
+            "roi_optimization": {},
+            "predictive_insights": {},
+            "action_plan": {"30_days": [], "60_days": [], "90_days": []},
+            "success_metrics": {}
+        }
+    
+    def invalidate(self, date_range: Optional[Tuple[date, date]] = None):
+        """
+        Drop cached engine results so the next run queries the database again
+        
+        Args:
+            date_range: Range to drop, or None to clear every cached range
+        """
+        with self._snapshot_lock:
+            if date_range is None:
+                self._snapshot_cache.clear()
+            else:
+                self._snapshot_cache.pop((date_range[0], date_range[1]), None)
+    
+    def _load_snapshot(self, date_range: Tuple[date, date]) -> FunnelSnapshot:
+        """Engine results for the date range, reused until the database changes or the range is invalidated"""
+        key = (date_range[0], date_range[1])
+        version = self.analytics_engine.data_version()
+        if version is not None:
+            with self._snapshot_lock:
+                cached = self._snapshot_cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        
+        # One read transaction, so all four results come from the same commit
+        results = self.analytics_engine.aggregate_window(date_range)
+        snapshot = FunnelSnapshot(*results, source_columns=_source_columns(results[1]))
+        
+        if version is not None:
+            with self._snapshot_lock:
+                self._snapshot_cache.pop(key, None)
+                if len(self._snapshot_cache) >= SNAPSHOT_CACHE_SIZE:
+                    self._snapshot_cache.pop(next(iter(self._snapshot_cache)))
+                self._snapshot_cache[key] = (version, snapshot)
+        
+        return snapshot
+    
     def _generate_strategic_insights(self, metrics: ConversionMetrics, 
-                                   source_performance: pd.DataFrame,
-                                   bottlenecks: List[BottleneckAnalysis],
+                                   sources: Dict[str, np.ndarray],
+                                   high_bottlenecks: List[BottleneckAnalysis],
                                    revenue_attribution: pd.DataFrame) -> List[StrategicInsight]:
         """Generate strategic insights based on funnel analysis"""
         insights = []
+        conversion_rate = metrics.overall_conversion_rate
+        sales_cycle_days = metrics.avg_sales_cycle_days
+        deal_size = metrics.avg_deal_size
         
         # 1. Conversion Rate Analysis
-        if metrics.overall_conversion_rate < 5.0:
+        if conversion_rate < 5.0:
             insights.append(StrategicInsight(
                 insight_type="CONVERSION_OPTIMIZATION",
                 priority="HIGH",
                 title="Critical Conversion Rate Issue",
-                description=f"Overall conversion rate of {metrics.overall_conversion_rate:.1f}% is significantly below industry standard of 8.5%",
+                description=f"Overall conversion rate of {conversion_rate:.1f}% is significantly below industry standard of 8.5%",
                 impact_estimate="Could increase revenue by 60-80% with optimization",
                 recommended_actions=[
-                    "Implement lead scoring to focus on high-quality prospects",
-                    "Review and improve qualification criteria",
-                    "Analyze lost prospects for common patterns",
-                    "Implement A/B testing for key funnel stages"
+                    ("Implement lead scoring to focus on high-quality prospects", ()),
+                    ("Review and improve qualification criteria", ()),
+                    ("Analyze lost prospects for common patterns", ()),
+                    ("Implement A/B testing for key funnel stages", ())
                 ],
                 success_metrics=[
                     "Target: 8%+ overall conversion rate within 90 days",
@@ -153,18 +373,18 @@ class FunnelInsightsGenerator:
                 ],
                 confidence_score=0.92
             ))
-        elif metrics.overall_conversion_rate > 12.0:
+        elif conversion_rate > 12.0:
             insights.append(StrategicInsight(
                 insight_type="SCALING_OPPORTUNITY",
                 priority="HIGH",
                 title="Exceptional Conversion Performance",
-                description=f"Conversion rate of {metrics.overall_conversion_rate:.1f}% is well above industry average - scaling opportunity",
+                description=f"Conversion rate of {conversion_rate:.1f}% is well above industry average - scaling opportunity",
                 impact_estimate="Could 2-3x revenue with increased lead volume",
                 recommended_actions=[
-                    "Scale investment in top-performing lead sources",
-                    "Expand team capacity to handle increased volume",
-                    "Document and systematize successful processes",
-                    "Consider raising pricing to optimize for deal value"
+                    ("Scale investment in top-performing lead sources", ()),
+                    ("Expand team capacity to handle increased volume", ()),
+                    ("Document and systematize successful processes", ()),
+                    ("Consider raising pricing to optimize for deal value", ())
                 ],
                 success_metrics=[
                     "Maintain 12%+ conversion while doubling lead volume",
@@ -174,44 +394,44 @@ class FunnelInsightsGenerator:
             ))
         
         # 2. Lead Source Optimization
-        if not source_performance.empty:
+        if len(sources['source_name']):
             # Identify top and bottom performers
-            top_source = source_performance.iloc[0]
-            bottom_sources = source_performance[source_performance['roi'] < 50]
+            top_name, top_roi = sources['source_name'][0], sources['roi'][0]
+            bottom_mask = sources['roi'] < 50
             
-            if top_source['roi'] > 200:
+            if top_roi > 200:
                 insights.append(StrategicInsight(
                     insight_type="INVESTMENT_SCALING",
                     priority="HIGH",
                     title="High-ROI Source Scaling Opportunity",
-                    description=f"{top_source['source_name']} shows exceptional {top_source['roi']:.0f}% ROI",
-                    impact_estimate=f"Could generate additional ${top_source['revenue_per_lead'] * 100:,.0f} monthly with 100 more leads",
+                    description=f"{top_name} shows exceptional {top_roi:.0f}% ROI",
+                    impact_estimate=f"Could generate additional ${sources['revenue_per_lead'][0] * 100:,.0f} monthly with 100 more leads",
                     recommended_actions=[
-                        f"Double marketing budget allocation to {top_source['source_name']}",
-                        "Analyze what makes this source successful",
-                        "Replicate successful tactics across other channels",
-                        "Set up dedicated tracking and optimization"
+                        ("Double marketing budget allocation to {}", (top_name,)),
+                        ("Analyze what makes this source successful", ()),
+                        ("Replicate successful tactics across other channels", ()),
+                        ("Set up dedicated tracking and optimization", ())
                     ],
                     success_metrics=[
-                        f"Increase {top_source['source_name']} lead volume by 50%",
-                        f"Maintain {top_source['roi']:.0f}%+ ROI at scale"
+                        f"Increase {top_name} lead volume by 50%",
+                        f"Maintain {top_roi:.0f}%+ ROI at scale"
                     ],
                     confidence_score=0.85
                 ))
             
-            if len(bottom_sources) > 0:
-                worst_sources = bottom_sources['source_name'].tolist()[:3]
+            if bottom_mask.any():
+                worst_sources = sources['source_name'][bottom_mask][:3].tolist()
                 insights.append(StrategicInsight(
                     insight_type="COST_OPTIMIZATION",
                     priority="MEDIUM",
                     title="Underperforming Source Optimization",
                     description=f"Sources showing poor ROI: {', '.join(worst_sources)}",
-                    impact_estimate=f"Could save ${bottom_sources['total_acquisition_cost'].sum():,.0f} monthly",
+                    impact_estimate=f"Could save ${sources['total_acquisition_cost'][bottom_mask].sum():,.0f} monthly",
                     recommended_actions=[
-                        "Pause or reduce spend on underperforming sources",
-                        "Analyze messaging and targeting for these channels",
-                        "A/B test different approaches before eliminating",
-                        "Reallocate budget to high-performing sources"
+                        ("Pause or reduce spend on underperforming sources", ()),
+                        ("Analyze messaging and targeting for these channels", ()),
+                        ("A/B test different approaches before eliminating", ()),
+                        ("Reallocate budget to high-performing sources", ())
                     ],
                     success_metrics=[
                         "Achieve 100%+ ROI on all active sources",
@@ -221,16 +441,15 @@ class FunnelInsightsGenerator:
                 ))
         
         # 3. Bottleneck Analysis
-        high_priority_bottlenecks = [b for b in bottlenecks if b.bottleneck_severity == "HIGH"]
-        if high_priority_bottlenecks:
-            primary_bottleneck = high_priority_bottlenecks[0]
+        if high_bottlenecks:
+            primary_bottleneck = high_bottlenecks[0]
             insights.append(StrategicInsight(
                 insight_type="PROCESS_OPTIMIZATION",
                 priority="HIGH",
                 title=f"Critical Bottleneck: {primary_bottleneck.stage_name}",
                 description=f"Stage conversion rate of {primary_bottleneck.conversion_rate:.1f}% with {primary_bottleneck.prospects_stuck} stuck prospects",
                 impact_estimate="Could improve overall conversion by 25-40%",
-                recommended_actions=primary_bottleneck.recommendations[:4],
+                recommended_actions=[(action, ()) for action in primary_bottleneck.recommendations[:4]],
                 success_metrics=[
                     f"Improve {primary_bottleneck.stage_name} conversion rate to 70%+",
                     f"Reduce average stage duration to target levels"
@@ -239,18 +458,18 @@ class FunnelInsightsGenerator:
             ))
         
         # 4. Sales Cycle Optimization
-        if metrics.avg_sales_cycle_days > 70:
+        if sales_cycle_days > 70:
             insights.append(StrategicInsight(
                 insight_type="VELOCITY_OPTIMIZATION",
                 priority="MEDIUM",
                 title="Sales Cycle Length Optimization",
-                description=f"Average sales cycle of {metrics.avg_sales_cycle_days:.0f} days is above optimal range",
+                description=f"Average sales cycle of {sales_cycle_days:.0f} days is above optimal range",
                 impact_estimate="Could increase revenue velocity by 20-30%",
                 recommended_actions=[
-                    "Implement urgency tactics and deadlines",
-                    "Streamline proposal and contract processes",
-                    "Improve qualification to focus on ready-to-buy prospects",
-                    "Create fast-track options for qualified prospects"
+                    ("Implement urgency tactics and deadlines", ()),
+                    ("Streamline proposal and contract processes", ()),
+                    ("Improve qualification to focus on ready-to-buy prospects", ()),
+                    ("Create fast-track options for qualified prospects", ())
                 ],
                 success_metrics=[
                     "Reduce average sales cycle to 45-60 days",
@@ -260,18 +479,18 @@ class FunnelInsightsGenerator:
             ))
         
         # 5. Deal Size Optimization
-        if not revenue_attribution.empty and metrics.avg_deal_size < 40000:
+        if not revenue_attribution.empty and deal_size < 40000:
             insights.append(StrategicInsight(
                 insight_type="VALUE_OPTIMIZATION",
                 priority="MEDIUM",
                 title="Deal Size Enhancement Opportunity",
-                description=f"Average deal size of ${metrics.avg_deal_size:,.0f} has room for improvement",
+                description=f"Average deal size of ${deal_size:,.0f} has room for improvement",
                 impact_estimate="Could increase revenue per deal by 20-40%",
                 recommended_actions=[
-                    "Implement value-based pricing strategies",
-                    "Create tiered service packages",
-                    "Focus on larger enterprise prospects",
-                    "Improve consultative selling techniques"
+                    ("Implement value-based pricing strategies", ()),
+                    ("Create tiered service packages", ()),
+                    ("Focus on larger enterprise prospects", ()),
+                    ("Improve consultative selling techniques", ())
                 ],
                 success_metrics=[
                     f"Increase average deal size to $50,000+",
@@ -284,76 +503,59 @@ class FunnelInsightsGenerator:
     
     def _compare_to_benchmarks(self, metrics: ConversionMetrics) -> List[BenchmarkComparison]:
         """Compare performance to industry benchmarks"""
-        comparisons = []
-        
-        benchmark_metrics = {
-            "Overall Conversion Rate": (metrics.overall_conversion_rate, self.industry_benchmarks["overall_conversion_rate"]),
-            "Lead to Discovery Rate": (metrics.lead_to_discovery_rate, self.industry_benchmarks["lead_to_discovery_rate"]),
-            "Discovery to Proposal Rate": (metrics.discovery_to_proposal_rate, self.industry_benchmarks["discovery_to_proposal_rate"]),
-            "Proposal to Contract Rate": (metrics.proposal_to_contract_rate, self.industry_benchmarks["proposal_to_contract_rate"]),
-            "Average Sales Cycle": (metrics.avg_sales_cycle_days, self.industry_benchmarks["avg_sales_cycle_days"]),
-            "Average Deal Size": (metrics.avg_deal_size, self.industry_benchmarks["avg_deal_size"])
-        }
-        
-        for metric_name, (your_value, benchmark) in benchmark_metrics.items():
-            if your_value == 0:
-                continue
-                
-            # Calculate percentile rank (simplified)
-            if "Cycle" in metric_name:
-                # For sales cycle, lower is better
-                performance_ratio = benchmark / your_value
-            else:
-                # For other metrics, higher is better
-                performance_ratio = your_value / benchmark
-            
-            if performance_ratio >= 1.5:
-                percentile_rank = 95
-                status = "EXCELLENT"
-            elif performance_ratio >= 1.2:
-                percentile_rank = 80
-                status = "GOOD"
-            elif performance_ratio >= 0.9:
-                percentile_rank = 60
-                status = "AVERAGE"
-            elif performance_ratio >= 0.7:
-                percentile_rank = 30
-                status = "BELOW_AVERAGE"
-            else:
-                percentile_rank = 10
-                status = "POOR"
-            
-            comparisons.append(BenchmarkComparison(
+        your_values = np.array([getattr(metrics, key) for _, key in BENCHMARK_METRICS], dtype=np.float64)
+        benchmarks = np.array([self.industry_benchmarks[key] for _, key in BENCHMARK_METRICS], dtype=np.float64)
+        reported = your_values != 0
+        
+        # Calculate percentile rank (simplified); for sales cycle lower is better, so the ratio is inverted
+        your_values, benchmarks = your_values[reported], benchmarks[reported]
+        ratios = np.where(BENCHMARK_LOWER_IS_BETTER[reported], benchmarks / your_values, your_values / benchmarks)
+        tiers = np.searchsorted(BENCHMARK_RATIO_THRESHOLDS, ratios, side='right')
+        
+        names = [name for (name, _), keep in zip(BENCHMARK_METRICS, reported) if keep]
+        comparisons = [
+            BenchmarkComparison(
                 metric_name=metric_name,
                 your_value=your_value,
                 industry_average=benchmark,
                 percentile_rank=percentile_rank,
                 performance_status=status
-            ))
+            )
+            for metric_name, your_value, benchmark, percentile_rank, status in zip(
+                names, your_values.tolist(), benchmarks.tolist(),
+                BENCHMARK_PERCENTILES[tiers].tolist(), BENCHMARK_STATUSES[tiers].tolist()
+            )
+        ]
         
         return comparisons
     
     def _identify_growth_opportunities(self, metrics: ConversionMetrics,
-                                     source_performance: pd.DataFrame,
-                                     bottlenecks: List[BottleneckAnalysis]) -> List[Dict[str, Any]]:
+                                     sources: Dict[str, np.ndarray],
+                                     medium_bottlenecks: List[BottleneckAnalysis]) -> List[Dict[str, Any]]:
         """Identify specific growth opportunities"""
         opportunities = []
         
         # 1. High-ROI source scaling
-        if not source_performance.empty:
-            high_roi_sources = source_performance[source_performance['roi'] > 200]
-            for _, source in high_roi_sources.iterrows():
+        if len(sources['source_name']):
+            # Projections for 50 more leads are computed column-wise before walking the rows
+            high_roi = sources['roi'] > 200
+            scaling_rows = zip(
+                sources['source_name'][high_roi].tolist(),
+                (sources['revenue_per_lead'][high_roi] * 50).tolist(),
+                (sources['cost_per_lead'][high_roi] * 50).tolist(),
+                sources['roi'][high_roi].tolist()
+            )
+            for source_name, projected_revenue, projected_spend, roi in scaling_rows:
                 opportunities.append({
                     "type": "SOURCE_SCALING",
-                    "title": f"Scale {source['source_name']}",
-                    "potential_impact": f"${source['revenue_per_lead'] * 50:,.0f}/month with 50 more leads",
-                    "investment_required": f"${source['cost_per_lead'] * 50:,.0f}/month",
-                    "roi_projection": f"{source['roi']:.0f}%+",
+                    "title": f"Scale {source_name}",
+                    "potential_impact": f"${projected_revenue:,.0f}/month with 50 more leads",
+                    "investment_required": f"${projected_spend:,.0f}/month",
+                    "roi_projection": f"{roi:.0f}%+",
                     "risk_level": "LOW"
                 })
         
         # 2. Bottleneck elimination
-        medium_bottlenecks = [b for b in bottlenecks if b.bottleneck_severity == "MEDIUM"]
         for bottleneck in medium_bottlenecks[:2]:  # Top 2 medium bottlenecks
             opportunities.append({
                 "type": "PROCESS_IMPROVEMENT",
@@ -378,29 +580,27 @@ class FunnelInsightsGenerator:
         return opportunities
     
     def _identify_risks(self, metrics: ConversionMetrics,
-                       source_performance: pd.DataFrame,
-                       bottlenecks: List[BottleneckAnalysis]) -> List[Dict[str, Any]]:
+                       sources: Dict[str, np.ndarray],
+                       high_bottlenecks: List[BottleneckAnalysis]) -> List[Dict[str, Any]]:
         """Identify potential risks to revenue"""
         risks = []
         
         # 1. Over-dependence on single source
-        if not source_performance.empty:
-            total_revenue = source_performance['total_revenue'].sum()
-            top_source_percentage = (source_performance.iloc[0]['total_revenue'] / total_revenue) * 100
+        if len(sources['source_name']):
+            top_source_percentage = sources['revenue_share'][0] * 100
             
             if top_source_percentage > 60:
                 risks.append({
                     "type": "CONCENTRATION_RISK",
                     "title": "Over-dependence on Single Lead Source",
-                    "description": f"{source_performance.iloc[0]['source_name']} represents {top_source_percentage:.0f}% of revenue",
+                    "description": f"{sources['source_name'][0]} represents {top_source_percentage:.0f}% of revenue",
                     "potential_impact": "High vulnerability to channel disruption",
                     "mitigation": "Diversify lead sources and reduce dependence",
                     "priority": "HIGH"
                 })
         
         # 2. Critical bottlenecks
-        critical_bottlenecks = [b for b in bottlenecks if b.bottleneck_severity == "HIGH"]
-        for bottleneck in critical_bottlenecks:
+        for bottleneck in high_bottlenecks:
             risks.append({
                 "type": "PROCESS_RISK",
                 "title": f"Critical Bottleneck: {bottleneck.stage_name}",
@@ -435,57 +635,47 @@ class FunnelInsightsGenerator:
             "expected_impact": {}
         }
         
+        # Bucket every source once; intervals are [lower, upper) to match the >= / < tiers
+        thresholds = self.efficiency_thresholds
+        bins = [-np.inf, thresholds["acceptable_roi"], thresholds["good_roi"], thresholds["excellent_roi"], np.inf]
+        buckets = pd.cut(source_performance['roi'], bins, right=False, labels=ROI_BUCKET_LABELS)
+        grouped = source_performance.groupby(buckets, observed=False)
+        distribution = grouped.agg(
+            count=('roi', 'size'),
+            total_spend=('total_acquisition_cost', 'sum'),
+            total_revenue=('total_revenue', 'sum'),
+            mean_roi=('roi', 'mean')
+        )
+        source_names = grouped['source_name'].agg(list)
+        
         # Analyze current ROI distribution
-        for efficiency_level, threshold in [
-            ("Excellent", self.efficiency_thresholds["excellent_roi"]),
-            ("Good", self.efficiency_thresholds["good_roi"]),
-            ("Acceptable", self.efficiency_thresholds["acceptable_roi"]),
-            ("Poor", 0)
-        ]:
-            if efficiency_level == "Poor":
-                sources = source_performance[source_performance['roi'] < self.efficiency_thresholds["poor_roi"]]
-            else:
-                next_threshold = {
-                    "Excellent": float('inf'),
-                    "Good": self.efficiency_thresholds["excellent_roi"],
-                    "Acceptable": self.efficiency_thresholds["good_roi"]
-                }.get(efficiency_level, 0)
-                
-                sources = source_performance[
-                    (source_performance['roi'] >= threshold) & 
-                    (source_performance['roi'] < next_threshold)
-                ]
-            
+        for efficiency_level in reversed(ROI_BUCKET_LABELS):
             plan["current_roi_distribution"][efficiency_level] = {
-                "count": len(sources),
-                "total_spend": sources['total_acquisition_cost'].sum() if not sources.empty else 0,
-                "total_revenue": sources['total_revenue'].sum() if not sources.empty else 0
+                "count": int(distribution.at[efficiency_level, 'count']),
+                "total_spend": float(distribution.at[efficiency_level, 'total_spend']),
+                "total_revenue": float(distribution.at[efficiency_level, 'total_revenue'])
             }
         
         # Generate optimization recommendations
-        excellent_sources = source_performance[source_performance['roi'] >= self.efficiency_thresholds["excellent_roi"]]
-        poor_sources = source_performance[source_performance['roi'] < self.efficiency_thresholds["poor_roi"]]
-        
-        if not excellent_sources.empty:
+        if distribution.at["Excellent", 'count']:
             plan["optimization_recommendations"].append({
                 "action": "SCALE_HIGH_PERFORMERS",
-                "sources": excellent_sources['source_name'].tolist(),
+                "sources": source_names["Excellent"],
                 "recommendation": "Increase budget allocation by 50-100%",
-                "expected_roi": f"{excellent_sources['roi'].mean():.0f}%+"
+                "expected_roi": f"{distribution.at['Excellent', 'mean_roi']:.0f}%+"
             })
         
-        if not poor_sources.empty:
+        if distribution.at["Poor", 'count']:
             plan["optimization_recommendations"].append({
                 "action": "OPTIMIZE_OR_PAUSE",
-                "sources": poor_sources['source_name'].tolist(),
+                "sources": source_names["Poor"],
                 "recommendation": "Reduce spend by 50% or pause while optimizing",
-                "potential_savings": f"${poor_sources['total_acquisition_cost'].sum():,.0f}/month"
+                "potential_savings": f"${distribution.at['Poor', 'total_spend']:,.0f}/month"
             })
         
         return plan
     
-    def _generate_predictive_insights(self, date_range: Tuple[date, date], 
-                                    metrics: ConversionMetrics) -> Dict[str, Any]:
+    def _generate_predictive_insights(self, metrics: ConversionMetrics) -> Dict[str, Any]:
         """Generate predictive insights based on current trends"""
         predictions = {
             "30_day_forecast": {},
@@ -495,25 +685,22 @@ class FunnelInsightsGenerator:
         }
         
         # Simple trend-based predictions (in a real system, use more sophisticated ML)
-        period_days = (date_range[1] - date_range[0]).days
+        forecast = _forecast_kernel(metrics.daily_leads, metrics.daily_revenue,
+                                    metrics.overall_conversion_rate, FORECAST_GROWTH_MULTIPLIER)
         
         # 30-day forecast
-        daily_leads = metrics.total_leads / period_days if period_days > 0 else 0
-        daily_revenue = metrics.total_revenue / period_days if period_days > 0 else 0
-        
         predictions["30_day_forecast"] = {
-            "projected_leads": int(daily_leads * 30),
-            "projected_contracts": int(daily_leads * 30 * (metrics.overall_conversion_rate / 100)),
-            "projected_revenue": daily_revenue * 30,
+            "projected_leads": forecast.leads_30,
+            "projected_contracts": forecast.contracts_30,
+            "projected_revenue": forecast.revenue_30,
             "confidence": "MEDIUM"
         }
         
         # 90-day forecast (with growth assumptions)
-        growth_multiplier = 1.1  # Assume 10% growth
         predictions["90_day_forecast"] = {
-            "projected_leads": int(daily_leads * 90 * growth_multiplier),
-            "projected_contracts": int(daily_leads * 90 * growth_multiplier * (metrics.overall_conversion_rate / 100)),
-            "projected_revenue": daily_revenue * 90 * growth_multiplier,
+            "projected_leads": forecast.leads_90,
+            "projected_contracts": forecast.contracts_90,
+            "projected_revenue": forecast.revenue_90,
             "confidence": "LOW"
         }
         
@@ -521,17 +708,17 @@ class FunnelInsightsGenerator:
         predictions["scenario_planning"] = {
             "conservative": {
                 "assumption": "No changes to current performance",
-                "90_day_revenue": daily_revenue * 90,
+                "90_day_revenue": forecast.revenue_conservative,
                 "probability": "HIGH"
             },
             "optimistic": {
                 "assumption": "20% improvement in conversion rate",
-                "90_day_revenue": daily_revenue * 90 * 1.2,
+                "90_day_revenue": forecast.revenue_optimistic,
                 "probability": "MEDIUM"
             },
             "aggressive": {
                 "assumption": "50% increase in leads + 20% better conversion",
-                "90_day_revenue": daily_revenue * 90 * 1.5 * 1.2,
+                "90_day_revenue": forecast.revenue_aggressive,
                 "probability": "LOW"
             }
         }
@@ -539,11 +726,10 @@ class FunnelInsightsGenerator:
         return predictions
     
     def _generate_executive_summary(self, metrics: ConversionMetrics,
-                                  insights: List[StrategicInsight],
+                                  priorities: InsightPriorities,
                                   benchmarks: List[BenchmarkComparison]) -> Dict[str, Any]:
         """Generate executive summary of key findings"""
         
-        high_priority_insights = [i for i in insights if i.priority == "HIGH"]
         excellent_benchmarks = [b for b in benchmarks if b.performance_status == "EXCELLENT"]
         poor_benchmarks = [b for b in benchmarks if b.performance_status == "POOR"]
         
@@ -555,11 +741,11 @@ class FunnelInsightsGenerator:
                 f"Average deal size: ${metrics.avg_deal_size:,.0f}",
                 f"Sales cycle length: {metrics.avg_sales_cycle_days:.0f} days"
             ],
-            "critical_actions_needed": len(high_priority_insights),
+            "critical_actions_needed": len(priorities.high),
             "areas_of_excellence": [b.metric_name for b in excellent_benchmarks],
             "areas_needing_improvement": [b.metric_name for b in poor_benchmarks],
-            "revenue_opportunity": self._estimate_revenue_opportunity(insights),
-            "recommended_focus": self._determine_recommended_focus(insights)
+            "revenue_opportunity": self._estimate_revenue_opportunity(len(priorities.high), len(priorities.medium)),
+            "recommended_focus": self._determine_recommended_focus(priorities.high_types)
         }
     
     def _calculate_health_score(self, benchmarks: List[BenchmarkComparison]) -> int:
@@ -567,58 +753,41 @@ class FunnelInsightsGenerator:
         if not benchmarks:
             return 50
         
-        percentile_sum = sum(b.percentile_rank for b in benchmarks)
-        return min(100, int(percentile_sum / len(benchmarks)))
+        percentile_ranks = np.fromiter((b.percentile_rank for b in benchmarks), dtype=np.int32, count=len(benchmarks))
+        return min(100, int(percentile_ranks.mean()))
     
-    def _estimate_revenue_opportunity(self, insights: List[StrategicInsight]) -> str:
-        """Estimate total revenue opportunity from insights"""
-        # Simplified estimation based on insight priorities and types
-        high_priority_count = len([i for i in insights if i.priority == "HIGH"])
-        medium_priority_count = len([i for i in insights if i.priority == "MEDIUM"])
-        
+    def _estimate_revenue_opportunity(self, high_priority_count: int, medium_priority_count: int) -> str:
+        """Estimate total revenue opportunity from the number of HIGH and MEDIUM priority insights"""
+        # Simplified estimation based on insight priorities
         opportunity_score = high_priority_count * 30 + medium_priority_count * 15
         
-        if opportunity_score > 80:
-            return "Very High (50%+ revenue increase potential)"
-        elif opportunity_score > 50:
-            return "High (25-50% revenue increase potential)"
-        elif opportunity_score > 25:
-            return "Medium (10-25% revenue increase potential)"
-        else:
-            return "Low (0-10% revenue increase potential)"
+        return next(
+            (label for threshold, label in _OPPORTUNITY_TIERS if opportunity_score > threshold),
+            "Low (0-10% revenue increase potential)"
+        )
     
-    def _determine_recommended_focus(self, insights: List[StrategicInsight]) -> str:
-        """Determine primary recommended focus area"""
-        insight_types = [i.insight_type for i in insights if i.priority == "HIGH"]
-        
-        if "CONVERSION_OPTIMIZATION" in insight_types:
-            return "Conversion Rate Optimization"
-        elif "PROCESS_OPTIMIZATION" in insight_types:
-            return "Bottleneck Elimination"
-        elif "INVESTMENT_SCALING" in insight_types:
-            return "High-ROI Source Scaling"
-        elif "COST_OPTIMIZATION" in insight_types:
-            return "Cost Efficiency Improvement"
-        else:
-            return "Performance Monitoring"
+    def _determine_recommended_focus(self, high_priority_types: Set[str]) -> str:
+        """Determine primary recommended focus area from the HIGH priority insight types"""
+        return next(
+            (focus for insight_type, focus in _FOCUS_ORDER if insight_type in high_priority_types),
+            "Performance Monitoring"
+        )
     
-    def _create_30_60_90_action_plan(self, insights: List[StrategicInsight]) -> Dict[str, List[str]]:
-        """Create a 30-60-90 day action plan"""
-        high_priority = [i for i in insights if i.priority == "HIGH"]
-        medium_priority = [i for i in insights if i.priority == "MEDIUM"]
-        
+    def _create_30_60_90_action_plan(self, high_priority: List[StrategicInsight],
+                                     medium_priority: List[StrategicInsight]) -> Dict[str, List[str]]:
+        """Create a 30-60-90 day action plan from the HIGH and MEDIUM priority insights"""
         return {
             "30_days": [
                 action for insight in high_priority[:2] 
-                for action in insight.recommended_actions[:2]
+                for action in map(_render_action, insight.recommended_actions[:2])
             ],
             "60_days": [
                 action for insight in high_priority[2:] + medium_priority[:1]
-                for action in insight.recommended_actions[:2]
+                for action in map(_render_action, insight.recommended_actions[:2])
             ],
             "90_days": [
                 action for insight in medium_priority[1:]
-                for action in insight.recommended_actions[:1]
+                for action in map(_render_action, insight.recommended_actions[:1])
             ]
         }
     